@@ -1,38 +1,535 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for
+from flask import (Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, g,
+                   has_request_context, before_render_template, template_rendered)
+from contextlib import contextmanager, redirect_stdout
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from functools import wraps
+import click
 import pandas as pd
+import numpy as np
 import os
+import sys
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape as xml_escape
+import hashlib
+import hmac
+import gzip
+import mimetypes
+import heapq
+import threading
+import time
 import re
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urlencode
 import random
 
+from page_cache import PageCache, SQLitePageStore
+from search import SearchIndex
+from stats import GroupStats
+from related import (RELATED_CITIES, NEARBY_CITIES, city_centroids, project, nearest_neighbours,
+                     related_cities)
+from ingest import LLC_COLUMNS, ingest_csv, summarize, write_report
+from metrics import Counter, Histogram, render_samples
+from profiler import SamplingProfiler, write_folded
+from assets import ASSET_DIR, build_assets, load_manifest, brotli
+from shared_data import write_shared, attach_shared, check_private, exclusive_lock, remove_stale
+from export import EXPORT_FORMATS, iter_export, encode_chunks
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
+app.config['LLC_DATA_CSV'] = os.environ.get('LLC_DATA_CSV', 'C:/llc-formation-website/LLC Data.csv')
+# Load data at startup instead of on the first request (e.g. for gunicorn --preload)
+app.config['LLC_PRELOAD'] = os.environ.get('LLC_PRELOAD', '').lower() in ('1', 'true', 'yes')
+# After a failed initial load, wait this many seconds before a request tries again
+app.config['LLC_LOAD_RETRY_SECONDS'] = float(os.environ.get('LLC_LOAD_RETRY_SECONDS', 30))
+# Rendered state/city pages kept per worker, and optionally in a SQLite file shared by workers
+app.config['PAGE_CACHE_MAX_BYTES'] = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['PAGE_CACHE_PATH'] = os.environ.get('PAGE_CACHE_PATH')
+# Poll the CSV every N seconds and reload it in the background when it changes (0 disables)
+app.config['LLC_RELOAD_INTERVAL'] = int(os.environ.get('LLC_RELOAD_INTERVAL', 0))
+# Bearer token for POST /admin/reload; the endpoint is disabled when unset
+app.config['LLC_ADMIN_TOKEN'] = os.environ.get('LLC_ADMIN_TOKEN')
+# File whose mtime /admin/reload bumps so every worker reloads (defaults to <csv>.reload)
+app.config['LLC_RELOAD_MARKER'] = os.environ.get('LLC_RELOAD_MARKER')
+# How often workers check the reload marker when /admin/reload is enabled
+app.config['LLC_RELOAD_MARKER_INTERVAL'] = float(os.environ.get('LLC_RELOAD_MARKER_INTERVAL', 5))
+# Bearer token for GET /api/export bulk downloads; the endpoint is disabled when unset
+app.config['EXPORT_TOKEN'] = os.environ.get('EXPORT_TOKEN')
+# Per-phase timings on every response as a Server-Timing header
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '1').lower() in ('1', 'true', 'yes')
+# Bearer token required by /metrics; open when unset
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Sample stacks during requests and write those slower than this to PROFILE_DIR (0 disables)
+app.config['PROFILE_SLOW_MS'] = float(os.environ.get('PROFILE_SLOW_MS', 0))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+app.config['PROFILE_INTERVAL_MS'] = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+# Compress HTML responses at least this large when the client accepts it (0 disables)
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+# Cache lifetime of fingerprinted assets under static/dist
+app.config['ASSET_MAX_AGE'] = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))
+# Directory (e.g. /dev/shm/llc) holding the built dataset as one memory-mapped file shared by all
+# workers; unset keeps a private copy per process
+app.config['LLC_SHARED_DIR'] = os.environ.get('LLC_SHARED_DIR')
+# Compiled templates are kept here so each worker skips parsing them (empty disables)
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(app.root_path, '.jinja-cache'))
+
+# Sitemaps hold at most this many URLs each before splitting into an index
+SITEMAP_MAX_URLS = 50000
+# Serialized sitemaps kept per dataset; they are keyed by host, so this is a bounded LRU
+SITEMAP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+class Dataset:
+    """One loaded version of the LLC data and everything derived from it.
+
+    A Dataset is not modified once built, apart from the lazily filled
+    caches below, which belong to its version. Reloading builds a new
+    Dataset and swaps the module-level `dataset` reference in one
+    assignment. Each request works against the Dataset that was current
+    when it started (see `get_dataset`).
+    """
+
+    def __init__(self, data=None, index=None, search_index=None, version='', loaded_at=None, load_seconds=0.0,
+                 data_modified=None):
+        self.data = data
+        self.index = index
+        self.search_index = search_index
+        # Identifies the loaded CSV (by size and mtime); caches key on it
+        self.version = version
+        self.loaded_at = loaded_at
+        # The CSV's mtime, the same in every worker; sitemaps report it as their modification time
+        self.data_modified = data_modified
+        self.load_seconds = load_seconds
+        # Serialized JSON API bodies and ETags, see cached_json
+        self.api_cache = {}
+        self.sitemap_entries = None
+        self.sitemap_cache = PageCache(SITEMAP_CACHE_MAX_BYTES)
+
+    def __len__(self):
+        return 0 if self.data is None else len(self.data)
 
 # Global variable to store LLC data
-llc_data = None
+dataset = Dataset()
 states_data = None
+# State abbreviation (lowercase) -> state slug, filled by load_states_data
+state_slugs_by_abbr = {}
+
+# Bump when the cached frame's layout changes so old caches are rebuilt
+LLC_CACHE_FORMAT = 4
+# Bump when the shared dataset's contents (the index or search index layout) change
+SHARED_DATA_FORMAT = 1
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+# Largest cities kept per state by build_llc_index
+TOP_CITIES_PER_STATE = 25
+
+def get_dataset():
+    """The dataset for the current request, or the current one outside a request"""
+    if has_request_context():
+        return g.get('dataset', dataset)
+    return dataset
+
+def build_dataset(csv_file):
+    """Read the CSV (or its cache) and build a Dataset with all its indexes.
+
+    With LLC_SHARED_DIR set, the dataset is attached from the shared file
+    for this CSV version instead, building and writing that file first if
+    no other process has.
+    """
+    started = time.perf_counter()
+    version = get_data_version(csv_file)
+    data_modified = datetime.fromtimestamp(int(os.stat(csv_file).st_mtime), timezone.utc)
+    if app.config['LLC_SHARED_DIR']:
+        parts = load_shared_dataset(csv_file, version)
+    else:
+        data = add_slug_columns(sort_by_rank(read_llc_frame(csv_file)))
+        parts = {'data': data, 'index': build_llc_index(data), 'search_index': SearchIndex.build(data)}
+    return Dataset(**parts,
+                   version=version,
+                   loaded_at=datetime.now(timezone.utc).replace(microsecond=0),
+                   load_seconds=time.perf_counter() - started,
+                   data_modified=data_modified)
+
+def get_shared_path(version):
+    return os.path.join(app.config['LLC_SHARED_DIR'], f'llc-{version}-{SHARED_DATA_FORMAT}.shm')
+
+def share_dataset_parts(data, index, search_index):
+    """What goes in the shared file: the frame with its text columns as Arrow strings, and the indexes.
+
+    Arrow string columns pickle as raw buffers, so they map from the file
+    like the numeric and categorical-code arrays. Object columns would be
+    rebuilt as Python strings in every process.
+    """
+    text_columns = [column for column in data.columns if data[column].dtype == object]
+    data = data.astype({column: 'string[pyarrow]' for column in text_columns})
+    return {'data': data, 'index': index, 'search_index': search_index}
+
+def load_shared_dataset(csv_file, version):
+    """Attach the shared dataset for `version`, building it if no process has yet.
+
+    One process builds while the others wait on the lock and then attach
+    to its file. Files for other versions are removed once a new one is
+    written. The directory and file must be private to this user, since
+    attaching unpickles the file.
+    """
+    shared_dir = app.config['LLC_SHARED_DIR']
+    os.makedirs(shared_dir, mode=0o700, exist_ok=True)
+    check_private(shared_dir)
+    path = get_shared_path(version)
+    if not os.path.exists(path):
+        with exclusive_lock(os.path.join(shared_dir, 'llc.lock')):
+            if not os.path.exists(path):
+                data = add_slug_columns(sort_by_rank(read_llc_frame(csv_file)))
+                size = write_shared(path, share_dataset_parts(data, build_llc_index(data), SearchIndex.build(data)))
+                print(f"Wrote shared dataset {path} ({size / 1024 ** 2:.1f} MB)")
+                remove_stale(os.path.join(shared_dir, 'llc-*.shm'), keep=path)
+    check_private(path)
+    return attach_shared(path)
+
+# Why the last load failed, reported by /readyz; None once a load succeeds
+data_load_error = None
 
 def load_llc_data(csv_file='C:/llc-formation-website/LLC Data.csv'):
-    """Load LLC data from CSV file"""
-    global llc_data
+    """Load LLC data from CSV file, replacing the current dataset once it is fully built"""
+    global dataset, data_load_error
     try:
         if os.path.exists(csv_file):
-            llc_data = pd.read_csv(csv_file)
-            # Clean and process data
-            llc_data = llc_data.fillna('')
-            # Filter for business data (remove rows with empty business names)
-            llc_data = llc_data[llc_data['name'].notna() & (llc_data['name'] != '')]
-            print(f"Loaded {len(llc_data)} business records")
+            new_dataset = build_dataset(csv_file)
+            previous_version = dataset.version
+            dataset = new_dataset
+            data_load_error = None
+            page_cache.clear()
+            memory_mb = new_dataset.data.memory_usage(deep=True).sum() / 1024 ** 2
+            print(f"Loaded {len(new_dataset)} business records ({memory_mb:.1f} MB, version {new_dataset.version}"
+                  f"{f', was {previous_version}' if previous_version else ''}) in {new_dataset.load_seconds:.2f}s")
             return True
         else:
-            print(f"CSV file not found: {csv_file}")
+            data_load_error = f"CSV file not found: {csv_file}"
+            print(data_load_error)
             return False
     except Exception as e:
-        print(f"Error loading CSV data: {e}")
+        data_load_error = f"Error loading CSV data: {e}"
+        print(data_load_error)
+        return False
+
+def get_llc_cache_paths(csv_file):
+    """Columnar cache file and its signature file, stored next to the CSV"""
+    base = os.path.splitext(csv_file)[0]
+    return f'{base}.feather', f'{base}.feather.json'
+
+def get_quality_report_path(csv_file):
+    """Data-quality report written by the last ingest of the CSV"""
+    return f'{os.path.splitext(csv_file)[0]}.quality.json'
+
+def _csv_signature(csv_file):
+    """Size, mtime and column list that a cache must match to be reused"""
+    stat = os.stat(csv_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'columns': LLC_COLUMNS,
+            'format': LLC_CACHE_FORMAT}
+
+def get_data_version(csv_file):
+    """Short hash of the CSV's signature, identical in every worker loading the same file"""
+    return hashlib.md5(json.dumps(_csv_signature(csv_file)).encode()).hexdigest()[:12]
+
+def memory_report(data):
+    """Bytes used by each column of a frame, including string contents"""
+    usage = data.memory_usage(index=False, deep=True)
+    return {column: int(usage[column]) for column in data.columns}
+
+def to_records(frame):
+    """Convert rows to dicts for templates and JSON, with missing ratings and coordinates as None"""
+    records = frame.to_dict('records')
+    for record in records:
+        rating = record.get('rating')
+        if rating is not None:
+            record['rating'] = None if rating != rating else round(float(rating), 2)
+        for column in ('latitude', 'longitude'):
+            value = record.get(column)
+            if value is not None:
+                record[column] = None if value != value else round(float(value), 6)
+    return records
+
+# Star icons for each whole-star rating, out of five and filled only
+STAR_ICONS = tuple(Markup('<i class="fas fa-star"></i>' * n + '<i class="far fa-star"></i>' * (5 - n))
+                   for n in range(6))
+FILLED_STAR_ICONS = tuple(Markup('<i class="fas fa-star"></i>' * n) for n in range(6))
+
+def add_card_fields(records):
+    """Add the per-business values the listing cards render: star icons and the city page URL.
+
+    Cards then read these instead of looping over stars, and each city's
+    URL is built once per page rather than once per business.
+    """
+    city_urls = {}
+    for record in records:
+        rating = record.get('rating')
+        stars = min(max(int(rating), 0), 5) if rating else 0
+        record['stars'] = STAR_ICONS[stars]
+        record['filled_stars'] = FILLED_STAR_ICONS[stars]
+        city = (record.get('state_slug'), record.get('city_slug'))
+        if city not in city_urls:
+            city_urls[city] = url_for('city_page', state_name=city[0], city_name=city[1]) if all(city) else None
+        record['city_url'] = city_urls[city]
+    return records
+
+def write_llc_cache(csv_file, data):
+    """Write the cleaned frame to a Feather cache; returns False if it can't be written"""
+    cache_file, signature_file = get_llc_cache_paths(csv_file)
+    # Per-process temporary names, so workers writing the cache at once don't clobber each other
+    cache_tmp, signature_tmp = f'{cache_file}.{os.getpid()}.tmp', f'{signature_file}.{os.getpid()}.tmp'
+    try:
+        data.reset_index(drop=True).to_feather(cache_tmp)
+        os.replace(cache_tmp, cache_file)
+        with open(signature_tmp, 'w') as f:
+            json.dump(_csv_signature(csv_file), f)
+        os.replace(signature_tmp, signature_file)
+        return True
+    except Exception as e:
+        # Read-only deploys and missing pyarrow just fall back to the CSV
+        print(f"Could not write LLC data cache: {e}")
+        for path in (cache_tmp, signature_tmp):
+            if os.path.exists(path):
+                os.remove(path)
         return False
 
+def read_llc_frame(csv_file):
+    """Read cleaned LLC rows from the columnar cache if it matches the CSV, else parse the CSV.
+
+    The first load after the CSV changes streams it through `ingest_csv` and
+    writes the cache and a data-quality report next to it; later loads read
+    the typed Feather file, which is much faster than parsing.
+    """
+    cache_file, signature_file = get_llc_cache_paths(csv_file)
+    try:
+        with open(signature_file) as f:
+            if json.load(f) == _csv_signature(csv_file):
+                return pd.read_feather(cache_file)
+    except (OSError, ValueError, ImportError):
+        pass
+
+    data, report = ingest_csv(csv_file)
+    print(summarize(report))
+    if write_llc_cache(csv_file, data):
+        write_report(report, get_quality_report_path(csv_file))
+    return data
+
+def sort_by_rank(data):
+    """Order rows best first (rating, then review count) and renumber them.
+
+    Every row-position index built afterwards is then rank ordered as well,
+    so the first N positions of any state, city or search match are its top N.
+    """
+    rating = data['rating'].fillna(0).to_numpy()
+    reviews = data['reviews'].to_numpy()
+    order = np.lexsort((-reviews, -rating))
+    return data.iloc[order].reset_index(drop=True)
+
+def slugify_series(values):
+    """Vectorized generate_seo_url over a Series of strings"""
+    values = values.astype(str).str.replace(r'[^a-zA-Z0-9\s-]', '', regex=True).str.strip()
+    return values.str.replace(r'\s+', '-', regex=True).str.lower()
+
+def _categorical_slugs(values):
+    """Slug each distinct value once and return the slugs as a categorical column"""
+    distinct = values.astype('category')
+    slugs = slugify_series(pd.Series(distinct.cat.categories))
+    slug_codes, slug_values = pd.factorize(slugs)
+    codes = distinct.cat.codes.to_numpy()
+    return pd.Categorical.from_codes(np.where(codes >= 0, slug_codes[codes], -1), categories=slug_values)
+
+def add_slug_columns(data):
+    """Add canonical `state_slug` and `city_slug` columns.
+
+    These are the only slugs used in URLs: routes look pages up by them,
+    the sitemap lists them and templates link with them, so every link to a
+    city resolves to the same page. The state comes from `state`, falling
+    back to `us_state`.
+    """
+    data = data.copy()
+    state_keys = _normalize_key(data['state'])
+    state_abbrs = state_keys.where(state_keys != '', _normalize_key(data['us_state']))
+    data['state_slug'] = state_abbrs.map(state_slugs_by_abbr).fillna('').astype('category')
+    data['city_slug'] = _categorical_slugs(data['city'])
+    return data
+
+def _normalize_key(values):
+    """Lowercase and strip a column for index keys"""
+    return values.astype(str).str.strip().str.lower()
+
+def _factorize_pairs(first, second):
+    """pd.factorize over (first, second) pairs: ids per row and the distinct pairs in first-seen order.
+
+    Factorizes each side and then one combined integer code, which avoids
+    a MultiIndex (that can't be built from zero rows).
+    """
+    first_ids, first_values = pd.factorize(first)
+    second_ids, second_values = pd.factorize(second)
+    width = max(len(second_values), 1)
+    ids, combined = pd.factorize(first_ids.astype(np.int64) * width + second_ids)
+    keys = list(zip(first_values[combined // width], second_values[combined % width]))
+    return ids, keys
+
+def build_llc_index(data):
+    """Build the state/city partition index over the LLC data.
+
+    Maps each lowercased state abbreviation to the row positions whose
+    `state` or `us_state` matches it, and each (state, city slug) pair to
+    the positions of that city's rows. Routes slice the frame with these
+    positions instead of scanning every row per request. `build_dataset`
+    builds a fresh index whenever the data is loaded.
+    """
+    positions = np.arange(len(data))
+    city_slugs = data['city_slug'].astype(str).to_numpy()
+
+    # A row belongs to every state named by either of its state columns
+    pairs = pd.DataFrame({
+        'state': np.concatenate([_normalize_key(data['state']).to_numpy(),
+                                 _normalize_key(data['us_state']).to_numpy()]),
+        'pos': np.concatenate([positions, positions]),
+    })
+    pairs = pairs[pairs['state'] != ''].drop_duplicates().sort_values('pos', kind='stable')
+    pairs['city'] = city_slugs[pairs['pos'].to_numpy()]
+    row_positions = pairs['pos'].to_numpy()
+
+    cities = {key: row_positions[rows]
+              for key, rows in pairs.groupby(['state', 'city'], sort=False).indices.items()}
+
+    # Per-state city lists, named after the spelling on each city's top-ranked row
+    city_names = data['city'].astype(str).to_numpy()
+    state_cities = {}
+    for (state, city_slug), rows in cities.items():
+        if city_slug:
+            state_cities.setdefault(state, []).append(
+                {'city': city_names[rows[0]], 'slug': city_slug, 'count': len(rows)})
+    for city_list in state_cities.values():
+        city_list.sort(key=lambda city: city['city'].lower())
+
+    # Nationwide city list for the locations pages, split by first letter
+    cities_by_letter = {}
+    for state, city_list in state_cities.items():
+        state_slug = state_slugs_by_abbr.get(state)
+        if state_slug is None:
+            continue
+        state_name = states_data[state_slug]['name']
+        for city in city_list:
+            cities_by_letter.setdefault(city_letter(city['city']), []).append(
+                {**city, 'state': state_name, 'state_slug': state_slug})
+    for city_list in cities_by_letter.values():
+        city_list.sort(key=lambda city: (city['city'].lower(), city['state']))
+
+    # One id per (state, city slug); city stats and the related/nearby tables are arrays over these ids
+    city_ids, city_keys = _factorize_pairs(pairs['state'].to_numpy(), pairs['city'].to_numpy())
+    city_stats = GroupStats.build(city_keys, city_ids, row_positions, data)
+    city_table = []
+    for state, city_slug in city_keys:
+        state_slug = state_slugs_by_abbr.get(state)
+        city_table.append({'city': city_names[cities[(state, city_slug)][0]], 'slug': city_slug,
+                           'count': int(city_stats.counts[len(city_table)]),
+                           'state': states_data[state_slug]['name'] if state_slug else '',
+                           'state_slug': state_slug})
+    # Only cities with a page of their own are linked to
+    linkable = np.array([bool(city['slug'] and city['state_slug']) for city in city_table], dtype=bool)
+    state_groups = {}
+    for i, (state, _) in enumerate(city_keys):
+        if linkable[i]:
+            state_groups.setdefault(state, []).append(i)
+    nearby = None
+    centroids = city_centroids(city_ids, row_positions, data, len(city_keys))
+    if centroids is not None:
+        centroids[~linkable] = np.nan
+        nearby = nearest_neighbours(project(centroids), linkable)
+
+    return {
+        'states': {state: row_positions[rows]
+                   for state, rows in pairs.groupby('state', sort=False).indices.items()},
+        'cities': cities,
+        'city_names': {key: city_names[rows[0]] for key, rows in cities.items()},
+        'state_cities': state_cities,
+        'top_cities': {state: heapq.nlargest(TOP_CITIES_PER_STATE, city_list, key=lambda city: city['count'])
+                       for state, city_list in state_cities.items()},
+        'cities_by_letter': dict(sorted(cities_by_letter.items())),
+        'state_stats': GroupStats.from_pairs(pairs['state'], row_positions, data),
+        'city_stats': city_stats,
+        'city_table': city_table,
+        'related_cities': related_cities(state_groups.values(), city_stats.counts, city_stats.top_categories),
+        'nearby_cities': nearby,
+    }
+
+def city_letter(name):
+    """Letter a city is listed under on the locations pages; '#' for anything but A-Z"""
+    letter = name.strip()[:1].upper()
+    return letter if 'A' <= letter <= 'Z' else '#'
+
+def get_state_rows(state_abbr):
+    """Row positions of businesses in a state"""
+    index = get_dataset().index
+    if index is None:
+        return _NO_ROWS
+    return index['states'].get(state_abbr.lower(), _NO_ROWS)
+
+def resolve_state(value):
+    """Find a state's info by slug, abbreviation or name; None if unknown"""
+    key = str(value).strip().lower()
+    slug = key.replace(' ', '-')
+    if slug in states_data:
+        return states_data[slug]
+    if key in state_slugs_by_abbr:
+        return states_data[state_slugs_by_abbr[key]]
+    return None
+
+def get_state_cities(state_abbr):
+    """Cities in a state as {'city', 'slug', 'count'} dicts sorted by name"""
+    index = get_dataset().index
+    if index is None:
+        return []
+    return index['state_cities'].get(state_abbr.lower(), [])
+
+def get_top_cities(state_abbr, limit=TOP_CITIES_PER_STATE):
+    """A state's largest cities as {'city', 'slug', 'count'} dicts, most businesses first"""
+    index = get_dataset().index
+    if index is None:
+        return []
+    return index['top_cities'].get(state_abbr.lower(), [])[:limit]
+
+def get_cities_by_letter():
+    """Cities in every known state grouped by city_letter, each group sorted by name"""
+    index = get_dataset().index
+    return {} if index is None else index['cities_by_letter']
+
+def get_state_stats(state_abbr):
+    """Precomputed business count, rating, review and category summary for a state, or None"""
+    index = get_dataset().index
+    return None if index is None else index['state_stats'].get(state_abbr.lower())
+
+def get_city_stats(state_abbr, city_slug):
+    """Precomputed summary for a city, or None"""
+    index = get_dataset().index
+    return None if index is None else index['city_stats'].get((state_abbr.lower(), city_slug.lower()))
+
+def _linked_cities(table, state_abbr, city_slug, limit):
+    index = get_dataset().index
+    if index is None or index[table] is None:
+        return []
+    i = index['city_stats'].ids.get((state_abbr.lower(), city_slug.lower()))
+    if i is None:
+        return []
+    return [index['city_table'][j] for j in index[table][i][:limit] if j >= 0]
+
+def get_related_cities(state_abbr, city_slug, limit=RELATED_CITIES):
+    """Cities in the same state sharing a city's top categories, as city dicts with state and state_slug"""
+    return _linked_cities('related_cities', state_abbr, city_slug, limit)
+
+def get_nearby_cities(state_abbr, city_slug, limit=NEARBY_CITIES):
+    """Closest cities by business coordinates, in any state; empty when the data has no coordinates"""
+    return _linked_cities('nearby_cities', state_abbr, city_slug, limit)
+
+def get_city_rows(state_abbr, city_slug):
+    """Row positions of businesses in a city, keyed by state abbreviation and canonical city slug"""
+    index = get_dataset().index
+    if index is None:
+        return _NO_ROWS
+    return index['cities'].get((state_abbr.lower(), city_slug.lower()), _NO_ROWS)
+
 def load_states_data():
     """Load states data for SEO pages"""
     global states_data
@@ -88,6 +585,481 @@ def load_states_data():
         'wisconsin': {'name': 'Wisconsin', 'abbr': 'WI', 'formation_fee': 130, 'annual_fee': 25},
         'wyoming': {'name': 'Wyoming', 'abbr': 'WY', 'formation_fee': 100, 'annual_fee': 50}
     }
+    state_slugs_by_abbr.clear()
+    state_slugs_by_abbr.update({info['abbr'].lower(): slug for slug, info in states_data.items()})
+
+_data_lock = threading.Lock()
+_data_ready = threading.Event()
+_data_load_thread = None
+_data_load_failed_at = None
+
+def ensure_data_loaded():
+    """Load states and LLC data once per process; concurrent callers wait for the first load.
+
+    The process only becomes ready after a successful load. A failed load
+    is retried by a later call once LLC_LOAD_RETRY_SECONDS have passed;
+    until then requests are served from the empty dataset.
+    """
+    global _data_load_failed_at
+    if _data_ready.is_set():
+        return
+    with _data_lock:
+        if _data_ready.is_set():
+            return
+        if (_data_load_failed_at is not None
+                and time.monotonic() - _data_load_failed_at < app.config['LLC_LOAD_RETRY_SECONDS']):
+            return
+        load_states_data()
+        if load_llc_data(app.config['LLC_DATA_CSV']):
+            _data_load_failed_at = None
+            _data_ready.set()
+        else:
+            _data_load_failed_at = time.monotonic()
+
+def require_data_loaded():
+    """ensure_data_loaded for CLI commands: exit with the load error instead of carrying on without data"""
+    ensure_data_loaded()
+    if not _data_ready.is_set():
+        raise click.ClickException(data_load_error or "LLC data is not loaded")
+
+def start_background_load():
+    """Start loading data in a background thread unless it is loaded or already loading"""
+    global _data_load_thread
+    with _data_lock:
+        if _data_ready.is_set() or (_data_load_thread is not None and _data_load_thread.is_alive()):
+            return
+        _data_load_thread = threading.Thread(target=ensure_data_loaded, name='llc-data-loader', daemon=True)
+        _data_load_thread.start()
+
+_reload_lock = threading.Lock()
+_watcher_pid = None
+# Reload marker mtime this process has already reloaded for
+_reload_marker_seen = None
+
+def reload_data():
+    """Rebuild the dataset from LLC_DATA_CSV and swap it in; False if a reload is already running"""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    try:
+        load_llc_data(app.config['LLC_DATA_CSV'])
+        return True
+    finally:
+        _reload_lock.release()
+
+def start_background_reload():
+    """Reload data in a background thread; False if a reload is already running"""
+    if _reload_lock.locked():
+        return False
+    threading.Thread(target=reload_data, name='llc-data-reloader', daemon=True).start()
+    return True
+
+def get_reload_marker_path():
+    return app.config['LLC_RELOAD_MARKER'] or f"{os.path.splitext(app.config['LLC_DATA_CSV'])[0]}.reload"
+
+def _reload_marker_mtime():
+    try:
+        return os.stat(get_reload_marker_path()).st_mtime_ns
+    except OSError:
+        return None
+
+def signal_reload():
+    """Bump the reload marker so every worker's watcher reloads, and reload this process now.
+
+    Returns False if this process is already reloading. The marker can't
+    always be written (e.g. a read-only data directory); then only this
+    process reloads.
+    """
+    global _reload_marker_seen
+    path = get_reload_marker_path()
+    try:
+        with open(path, 'a'):
+            os.utime(path)
+        _reload_marker_seen = _reload_marker_mtime()
+    except OSError as e:
+        print(f"Could not update reload marker {path}: {e}")
+    return start_background_reload()
+
+def _watch_data_file(interval, csv_interval):
+    """Reload when the reload marker changes, and (every `csv_interval` seconds, if set) when the CSV does"""
+    global _reload_marker_seen
+    csv_file = app.config['LLC_DATA_CSV']
+    csv_checked = time.monotonic()
+    while True:
+        time.sleep(interval)
+        marker = _reload_marker_mtime()
+        if marker is not None and marker != _reload_marker_seen:
+            print("Reload requested through the reload marker, reloading")
+            # A busy reload leaves the marker unseen, so the next check tries again
+            if reload_data():
+                _reload_marker_seen = marker
+            continue
+        if not csv_interval or time.monotonic() - csv_checked < csv_interval:
+            continue
+        csv_checked = time.monotonic()
+        try:
+            changed = os.path.exists(csv_file) and get_data_version(csv_file) != dataset.version
+        except OSError:
+            changed = False
+        if changed:
+            print(f"Detected change to {csv_file}, reloading")
+            reload_data()
+
+def start_data_watcher():
+    """Start the reload watcher in this process if LLC_RELOAD_INTERVAL or LLC_ADMIN_TOKEN is set.
+
+    With LLC_RELOAD_INTERVAL the CSV is polled for changes. With
+    LLC_ADMIN_TOKEN the reload marker bumped by /admin/reload is checked
+    every LLC_RELOAD_MARKER_INTERVAL seconds, so a reload reaches every
+    worker, not just the one that took the request. Threads don't survive
+    fork, so this runs again in each worker process.
+    """
+    global _watcher_pid, _reload_marker_seen
+    csv_interval = app.config['LLC_RELOAD_INTERVAL']
+    admin = bool(app.config['LLC_ADMIN_TOKEN'])
+    if not (csv_interval or admin) or _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    # This process's data is newer than any marker already there
+    _reload_marker_seen = _reload_marker_mtime()
+    interval = min(value for value in (csv_interval, admin and app.config['LLC_RELOAD_MARKER_INTERVAL']) if value)
+    threading.Thread(target=_watch_data_file, args=(interval, csv_interval), name='llc-data-watcher',
+                     daemon=True).start()
+
+def make_page_cache():
+    """Build the rendered-page cache from PAGE_CACHE_MAX_BYTES and PAGE_CACHE_PATH"""
+    max_bytes = app.config['PAGE_CACHE_MAX_BYTES']
+    store = SQLitePageStore(app.config['PAGE_CACHE_PATH'], max_bytes) if app.config['PAGE_CACHE_PATH'] else None
+    return PageCache(max_bytes, store)
+
+page_cache = make_page_cache()
+# Compressed bodies of cached pages, keyed by encoding and ETag, so cache hits aren't recompressed
+compressed_cache = PageCache(app.config['PAGE_CACHE_MAX_BYTES'])
+
+def cached_page(view):
+    """Serve a page from the render cache, rendering and storing it on a miss.
+
+    The key covers the endpoint, its arguments, the query string, the host,
+    the data version and the build (templates and assets), which together
+    determine the rendered HTML. Only 200 responses are cached. Responses carry an ETag and honour
+    If-None-Match with a 304.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # The shared store outlives deploys, so pages from older templates or assets must miss
+        version = f'{get_dataset().version}-{build_fingerprint}'
+        key = '|'.join([request.endpoint, request.host_url, version,
+                        json.dumps(request.view_args, sort_keys=True),
+                        json.dumps(sorted(request.args.items(multi=True)))])
+        with timed('cache'):
+            entry = page_cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (body, hashlib.md5(body).hexdigest(), response.mimetype)
+            page_cache.set(key, version, entry)
+
+        body, etag, mimetype = entry
+        response = app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        return response.make_conditional(request)
+    return wrapper
+
+def configure_app(config=None):
+    """Configure the module's `app` and arrange for its data to be loaded.
+
+    There is one application per process; calling this again reconfigures
+    it. `config` may override LLC_DATA_CSV, LLC_PRELOAD and the PAGE_CACHE_*
+    settings. With LLC_PRELOAD the
+    data is loaded here, so a `gunicorn --preload` master loads it once and
+    forked workers share it copy-on-write. Otherwise each worker loads it on
+    its first request; /readyz reports 503 until then.
+    """
+    global page_cache, compressed_cache
+    if config:
+        app.config.update(config)
+        if any(key.startswith('PAGE_CACHE_') for key in config):
+            page_cache = make_page_cache()
+            compressed_cache = PageCache(app.config['PAGE_CACHE_MAX_BYTES'])
+    global asset_manifest, build_fingerprint
+    asset_manifest = load_manifest(app.static_folder)
+    build_fingerprint = get_build_fingerprint()
+    configure_template_cache()
+    if app.config['LLC_PRELOAD']:
+        warm_templates()
+        ensure_data_loaded()
+
+def configure_template_cache():
+    """Keep compiled templates in TEMPLATE_CACHE_DIR, shared by every worker and restart"""
+    cache_dir = app.config['TEMPLATE_CACHE_DIR']
+    app.jinja_env.bytecode_cache = None
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            if not os.access(cache_dir, os.W_OK):
+                raise PermissionError(f"{cache_dir} is not writable")
+        except OSError as e:
+            # Read-only deploys just compile templates in memory
+            print(f"Could not use template cache {cache_dir}: {e}")
+            return
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+def warm_templates():
+    """Compile every template now, filling the bytecode cache and this process's template cache.
+
+    Under `gunicorn --preload` the workers fork with the templates already
+    compiled. Returns how many templates were loaded.
+    """
+    names = app.jinja_env.list_templates(extensions=['html', 'xml', 'txt'])
+    with timed('compile'):
+        for name in names:
+            app.jinja_env.get_template(name)
+    return len(names)
+
+configure_template_cache()
+
+# Source path -> fingerprinted path under static/dist, from `flask build-assets`
+asset_manifest = load_manifest(app.static_folder)
+
+def get_build_fingerprint():
+    """Short hash of every template's source and the asset manifest: what a deploy changes in rendered pages"""
+    digest = hashlib.md5(json.dumps(asset_manifest, sort_keys=True).encode())
+    for name in sorted(app.jinja_env.list_templates()):
+        digest.update(name.encode())
+        digest.update(app.jinja_env.loader.get_source(app.jinja_env, name)[0].encode())
+    return digest.hexdigest()[:12]
+
+build_fingerprint = get_build_fingerprint()
+
+@app.template_global()
+def static_url(filename):
+    """URL of a static file, using its fingerprinted build when there is one"""
+    return url_for('static', filename=asset_manifest.get(filename, filename))
+
+def serve_static(filename):
+    """Static files, with built assets sent precompressed and cacheable for good.
+
+    Fingerprinted names change whenever the content does, so they can be
+    cached as immutable. The .br or .gz variant written by `build_assets`
+    is sent when the client accepts it.
+    """
+    if not filename.startswith(ASSET_DIR + '/') or filename.endswith(('.gz', '.br')):
+        return app.send_static_file(filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype,
+                                           max_age=app.config['ASSET_MAX_AGE'])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, mimetype=mimetype,
+                                       max_age=app.config['ASSET_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = serve_static
+
+request_latency = Histogram('llc_request_duration_seconds', 'Time spent handling requests', ['endpoint'])
+phase_latency = Histogram('llc_request_phase_seconds', 'Time spent in each phase of a request',
+                          ['endpoint', 'phase'])
+request_count = Counter('llc_requests_total', 'Requests handled', ['endpoint', 'status'])
+profiler = SamplingProfiler()
+
+def add_timing(phase, seconds):
+    """Add time spent in a phase (filter, serialize, render, ...) to the current request"""
+    if has_request_context():
+        timings = g.setdefault('timings', {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - started)
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        add_timing('render', time.perf_counter() - started)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if app.config['PROFILE_SLOW_MS']:
+        profiler.interval = app.config['PROFILE_INTERVAL_MS'] / 1000
+        profiler.start(threading.get_ident())
+
+@app.before_request
+def load_data_before_request():
+    """Make sure data is loaded, and pin this request to the current dataset"""
+    if request.endpoint in ('healthz', 'readyz', 'metrics', 'static'):
+        return
+    if _data_ready.is_set():
+        ensure_data_loaded()
+    else:
+        with timed('load'):
+            ensure_data_loaded()
+    start_data_watcher()
+    g.dataset = dataset
+
+@app.after_request
+def record_request_timing(response):
+    """Record latency metrics, add the Server-Timing header and keep profiles of slow requests.
+
+    Streamed bodies (the sitemaps) are generated after this runs, so their
+    time is not included.
+    """
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    timings = g.get('timings', {})
+    request_latency.observe(elapsed, endpoint)
+    request_count.inc(endpoint, str(response.status_code))
+    for phase, seconds in timings.items():
+        phase_latency.observe(seconds, endpoint, phase)
+
+    if app.config['SERVER_TIMING']:
+        metrics = [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in timings.items()]
+        response.headers['Server-Timing'] = ', '.join(metrics + [f'total;dur={elapsed * 1000:.2f}'])
+
+    if app.config['PROFILE_SLOW_MS']:
+        stacks = profiler.stop(threading.get_ident())
+        if elapsed * 1000 >= app.config['PROFILE_SLOW_MS'] and stacks:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{elapsed * 1000:.0f}ms-{os.getpid()}.folded"
+            write_folded(stacks, os.path.join(app.config['PROFILE_DIR'], name))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress HTML bodies of at least COMPRESS_MIN_BYTES with brotli or gzip.
+
+    Registered after record_request_timing so it runs first and its time
+    shows up in Server-Timing. Bodies with an ETag (the cached pages) are
+    compressed once per encoding. The ETag becomes weak, as the compressed
+    body differs byte for byte but If-None-Match still matches it.
+    """
+    min_bytes = app.config['COMPRESS_MIN_BYTES']
+    if (not min_bytes or response.mimetype != 'text/html' or response.status_code != 200
+            or response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if brotli is not None and request.accept_encodings['br']:
+        encoding = 'br'
+    elif request.accept_encodings['gzip']:
+        encoding = 'gzip'
+    else:
+        return response
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+    etag, weak = response.get_etag()
+    key = f'{encoding}|{etag}' if etag else None
+    with timed('compress'):
+        entry = compressed_cache.get(key) if key else None
+        if entry is None:
+            if encoding == 'br':
+                # Quality 5 compresses about as fast as gzip -6 and a little smaller
+                entry = (brotli.compress(body, quality=5), etag, response.mimetype)
+            else:
+                entry = (gzip.compress(body, compresslevel=app.config['COMPRESS_LEVEL']), etag, response.mimetype)
+            if key:
+                compressed_cache.set(key, None, entry)
+    response.set_data(entry[0])
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc):
+    # after_request is skipped when a view raises; don't leave the thread registered
+    if app.config['PROFILE_SLOW_MS']:
+        profiler.stop(threading.get_ident())
+
+def bearer_token_matches(token):
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+
+@app.route('/healthz')
+def healthz():
+    """Liveness check: the process is up"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness check: 200 once data is loaded, 503 (and start loading) before that or after a failed load"""
+    if not _data_ready.is_set():
+        start_background_load()
+        error = data_load_error
+        response = jsonify({'status': 'error', 'error': error} if error else {'status': 'loading'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    current = get_dataset()
+    return jsonify({
+        'status': 'ready',
+        'records': len(current),
+        'data_version': current.version,
+        'loaded_at': current.loaded_at.isoformat() if current.loaded_at else None,
+        'reloading': _reload_lock.locked(),
+        'page_cache': page_cache.stats(),
+    })
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Reload the CSV in every worker; requires 'Authorization: Bearer <LLC_ADMIN_TOKEN>'.
+
+    This worker reloads in the background right away; the others pick the
+    reload up from the reload marker within LLC_RELOAD_MARKER_INTERVAL.
+    """
+    token = app.config['LLC_ADMIN_TOKEN']
+    if not token:
+        return "Not found", 404
+    if not bearer_token_matches(token):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not signal_reload():
+        return jsonify({'status': 'already reloading'}), 409
+    return jsonify({'status': 'reloading', 'data_version': dataset.version}), 202
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process"""
+    token = app.config['METRICS_TOKEN']
+    if token and not bearer_token_matches(token):
+        return "Unauthorized", 401
+    current = get_dataset()
+    cache = page_cache.stats()
+    lookups = cache['hits'] + cache['shared_hits'] + cache['misses']
+    lines = request_latency.render() + phase_latency.render() + request_count.render()
+    lines += render_samples('llc_page_cache_lookups_total', 'Page cache lookups by result', 'counter',
+                            [({'result': 'hit'}, cache['hits']), ({'result': 'shared_hit'}, cache['shared_hits']),
+                             ({'result': 'miss'}, cache['misses'])])
+    lines += render_samples('llc_page_cache_hit_ratio', 'Share of page cache lookups served from a cache',
+                            'gauge', [({}, (cache['hits'] + cache['shared_hits']) / lookups if lookups else 0)])
+    lines += render_samples('llc_page_cache_bytes', 'Bytes of rendered pages held in this process',
+                            'gauge', [({}, cache['bytes'])])
+    lines += render_samples('llc_dataset_info', 'Version of the loaded LLC data',
+                            'gauge', [({'version': current.version}, 1)])
+    lines += render_samples('llc_dataset_rows', 'Business records loaded', 'gauge', [({}, len(current))])
+    lines += render_samples('llc_dataset_load_seconds', 'Time taken to build the loaded dataset',
+                            'gauge', [({}, round(current.load_seconds, 6))])
+    if current.loaded_at is not None:
+        lines += render_samples('llc_dataset_loaded_timestamp_seconds', 'When the loaded dataset was built',
+                                'gauge', [({}, int(current.loaded_at.timestamp()))])
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 def generate_seo_url(text):
     """Generate SEO-friendly URL from text"""
@@ -117,70 +1089,295 @@ def llc_formation():
                          meta_description="Complete LLC formation services including filing, compliance, and ongoing support. Expert guidance for starting your business right.",
                          structured_data=get_service_structured_data())
 
+LISTING_PAGE_SIZE = 12
+LISTING_MAX_PAGE_SIZE = 100
+
+def get_page_args(default_limit=LISTING_PAGE_SIZE):
+    """Read the page (from a /page/<n> path or ?page=) and ?limit=, clamped to sane bounds.
+
+    A page number in the path is returned as is, so /page/0 gets a 404 from
+    make_pagination rather than duplicating page 1.
+    """
+    page = request.view_args.get('page')
+    if page is None:
+        page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', default_limit, type=int), 1), LISTING_MAX_PAGE_SIZE)
+    return page, limit
+
+def make_pagination(total, page, limit):
+    """Describe one page of `total` items; None when the page is before the first or past the end"""
+    pages = max(-(-total // limit), 1)
+    if page < 1 or page > pages:
+        return None
+    return {'page': page, 'limit': limit, 'total': total, 'pages': pages,
+            'has_prev': page > 1, 'has_next': page < pages}
+
+def paginate_rows(rows, page, limit, cards=True):
+    """Slice one page of row positions and describe it.
+
+    Returns (records, pagination), or (None, None) when the page is past the
+    end. Only the rows on the page are converted to dicts. With `cards` the
+    records also get the fields from `add_card_fields`.
+    """
+    pagination = make_pagination(len(rows), page, limit)
+    if pagination is None:
+        return None, None
+
+    page_rows = rows[(page - 1) * limit:page * limit]
+    records = []
+    if len(page_rows) > 0:
+        with timed('filter'):
+            frame = get_dataset().data.iloc[page_rows]
+        with timed('serialize'):
+            records = to_records(frame)
+            if cards:
+                add_card_fields(records)
+    return records, pagination
+
+def add_page_urls(pagination, default_limit=LISTING_PAGE_SIZE, **params):
+    """Add prev/next URLs for the current endpoint to a pagination dict.
+
+    `params` are extra query arguments every page keeps (e.g. a letter filter).
+    """
+    extra = dict(params) if pagination['limit'] == default_limit else {**params, 'limit': pagination['limit']}
+    view_args = {key: value for key, value in request.view_args.items() if key != 'page'}
+    page = pagination['page']
+    # url_for puts `page` in the path on endpoints with a /page/<n> rule, in the query string elsewhere
+    pagination['prev_url'] = (url_for(request.endpoint, **view_args, **extra,
+                                      **({'page': page - 1} if page > 2 else {}))
+                              if pagination['has_prev'] else None)
+    pagination['next_url'] = (url_for(request.endpoint, **view_args, **extra, page=page + 1)
+                              if pagination['has_next'] else None)
+    return pagination
+
+def redirect_to_page_path():
+    """301 from ?page=N and /page/1 to the canonical page URL, or None if already canonical.
+
+    Used by the pages with a /page/<n> rule, so each page has one URL
+    and prerendered copies can be served without a query string.
+    """
+    path_page = request.view_args.get('page')
+    query_page = request.args.get('page', type=int)
+    if path_page != 1 and query_page is None:
+        return None
+    view_args = {key: value for key, value in request.view_args.items() if key != 'page'}
+    page = path_page if path_page is not None else query_page
+    if page > 1:
+        view_args['page'] = page
+    return redirect(with_query(url_for(request.endpoint, **view_args), exclude=('page',)), code=301)
+
+def with_query(url, exclude=()):
+    """`url` followed by the current request's query string, minus the `exclude` keys.
+
+    Redirects use this rather than passing request.args to url_for, where
+    a query key could clash with a view argument or set _external and co.
+    """
+    args = [(key, value) for key, value in request.args.items(multi=True) if key not in exclude]
+    return f'{url}?{urlencode(args)}' if args else url
+
+def page_suffix(pagination):
+    """Title suffix that keeps paginated pages' titles distinct"""
+    return f" - Page {pagination['page']}" if pagination['page'] > 1 else ""
+
 @app.route('/state/<state_slug>')
-def state_llc_formation(state_slug):
+@app.route('/state/<state_slug>/page/<int:page>')
+@cached_page
+def state_llc_formation(state_slug, page=None):
     """State-specific LLC formation pages for SEO"""
     if state_slug not in states_data:
         return "State not found", 404
+    canonical = redirect_to_page_path()
+    if canonical is not None:
+        return canonical
     
     state_info = states_data[state_slug]
+    page, limit = get_page_args()
     
-    # Get businesses in this state
-    if llc_data is not None:
-        state_businesses = llc_data[
-            (llc_data['state'].str.lower() == state_info['abbr'].lower()) |
-            (llc_data['us_state'].str.lower() == state_info['abbr'].lower())
-        ]
-    else:
-        state_businesses = pd.DataFrame()
+    # Get one page of businesses in this state
+    businesses, pagination = paginate_rows(get_state_rows(state_info['abbr']), page, limit)
+    if pagination is None:
+        return "Page not found", 404
+    add_page_urls(pagination)
+    top_cities = get_top_cities(state_info['abbr'], 6)
     
-    title = f"LLC Formation in {state_info['name']} - Start Your {state_info['abbr']} LLC"
+    title = f"LLC Formation in {state_info['name']} - Start Your {state_info['abbr']} LLC{page_suffix(pagination)}"
     meta_description = f"Form your LLC in {state_info['name']} with our expert services. {state_info['name']} LLC formation fee: ${state_info['formation_fee']}. Get started today!"
+    with timed('structured_data'):
+        structured_data = get_state_structured_data(state_info)
     
     return render_template('state_llc.html',
                          state=state_info,
-                         businesses=state_businesses.to_dict('records') if len(state_businesses) > 0 else [],
+                         state_slug=state_slug,
+                         stats=get_state_stats(state_info['abbr']),
+                         cities=top_cities,
+                         businesses=businesses,
+                         pagination=pagination,
                          title=title,
                          meta_description=meta_description,
-                         structured_data=get_state_structured_data(state_info))
+                         structured_data=structured_data)
 
 @app.route('/city/<state_slug>/<city_slug>')
-def city_llc_formation(state_slug, city_slug):
+@app.route('/city/<state_slug>/<city_slug>/page/<int:page>')
+@cached_page
+def city_llc_formation(state_slug, city_slug, page=None):
     """City-specific LLC formation pages for SEO"""
     if state_slug not in states_data:
         return "State not found", 404
-    
     state_info = states_data[state_slug]
+
+    city_rows = get_city_rows(state_info['abbr'], city_slug)
+    canonical_slug = generate_seo_url(city_slug)
+    if len(city_rows) == 0 and canonical_slug != city_slug and len(get_city_rows(state_info['abbr'], canonical_slug)) > 0:
+        # Old links used a looser slug (e.g. st.-helena); send them straight to the canonical page URL
+        page = page if page is not None else request.args.get('page', type=int)
+        return redirect(with_query(url_for('city_llc_formation', state_slug=state_slug, city_slug=canonical_slug,
+                                           **({'page': page} if page and page > 1 else {})),
+                                   exclude=('page',)), code=301)
+    canonical = redirect_to_page_path()
+    if canonical is not None:
+        return canonical
+
+    # Get one page of businesses in this city
+    page, limit = get_page_args()
+    businesses, pagination = paginate_rows(city_rows, page, limit)
+    if pagination is None:
+        return "Page not found", 404
+    add_page_urls(pagination)
     
-    # Get businesses in this city
-    if llc_data is not None:
-        city_businesses = llc_data[
-            (llc_data['state'].str.lower() == state_info['abbr'].lower()) |
-            (llc_data['us_state'].str.lower() == state_info['abbr'].lower())
-        ]
-        city_businesses = city_businesses[
-            city_businesses['city'].str.lower().str.replace(' ', '-') == city_slug.lower()
-        ]
-    else:
-        city_businesses = pd.DataFrame()
-    
-    # Get city name from first business or use slug
-    if len(city_businesses) > 0:
-        city_name = city_businesses.iloc[0]['city']
+    # Get city name from the index or use slug
+    if len(city_rows) > 0:
+        city_name = get_dataset().index['city_names'][(state_info['abbr'].lower(), city_slug.lower())]
     else:
         city_name = city_slug.replace('-', ' ').title()
     
-    title = f"LLC Formation in {city_name}, {state_info['abbr']} - Start Your Business"
+    title = f"LLC Formation in {city_name}, {state_info['abbr']} - Start Your Business{page_suffix(pagination)}"
     meta_description = f"Form your LLC in {city_name}, {state_info['name']} with our expert services. Local business formation support in {city_name}. Get started today!"
+    with timed('structured_data'):
+        structured_data = get_city_structured_data(state_info, city_name)
     
     return render_template('city_llc.html',
                          state=state_info,
                          city_name=city_name,
                          city_slug=city_slug,
-                         businesses=city_businesses.to_dict('records') if len(city_businesses) > 0 else [],
+                         stats=get_city_stats(state_info['abbr'], city_slug),
+                         related_cities=get_related_cities(state_info['abbr'], city_slug),
+                         nearby_cities=get_nearby_cities(state_info['abbr'], city_slug),
+                         businesses=businesses,
+                         pagination=pagination,
                          title=title,
                          meta_description=meta_description,
-                         structured_data=get_city_structured_data(state_info, city_name))
+                         structured_data=structured_data)
+
+DIRECTORY_PAGE_SIZE = 50
+LOCATIONS_PAGE_SIZE = 300
+
+@app.route('/locations')
+@cached_page
+def all_locations():
+    """Directory of every state, and of the cities starting with one letter, a page at a time"""
+    cities_by_letter = get_cities_by_letter()
+    letters = list(cities_by_letter)
+    letter = request.args.get('letter', letters[0] if letters else 'A').upper()
+    if letters and letter not in cities_by_letter:
+        return "Letter not found", 404
+
+    page, limit = get_page_args(LOCATIONS_PAGE_SIZE)
+    cities = cities_by_letter.get(letter, [])
+    pagination = make_pagination(len(cities), page, limit)
+    if pagination is None:
+        return "Page not found", 404
+    add_page_urls(pagination, LOCATIONS_PAGE_SIZE, letter=letter)
+
+    states = [{'name': info['name'], 'slug': slug, 'count': len(get_state_rows(info['abbr']))}
+              for slug, info in states_data.items()]
+    return render_template('all_locations.html',
+                           states=states,
+                           letters=letters,
+                           letter=letter,
+                           cities_with_states=cities[(page - 1) * limit:page * limit],
+                           city_count=sum(len(group) for group in cities_by_letter.values()),
+                           pagination=pagination)
+
+@app.route('/directory/<state_name>')
+@cached_page
+def state_page(state_name):
+    """Directory of a state's businesses and its largest cities"""
+    state_info = resolve_state(state_name)
+    if state_info is None:
+        return "State not found", 404
+    state_slug = state_slugs_by_abbr[state_info['abbr'].lower()]
+    if state_name != state_slug:
+        return redirect(with_query(url_for('state_page', state_name=state_slug)), code=301)
+
+    page, limit = get_page_args(DIRECTORY_PAGE_SIZE)
+    rows = get_state_rows(state_info['abbr'])
+    businesses, pagination = paginate_rows(rows, page, limit)
+    if pagination is None:
+        return "Page not found", 404
+    add_page_urls(pagination, DIRECTORY_PAGE_SIZE)
+
+    return render_template('state.html',
+                           state=state_info['name'],
+                           state_slug=state_slug,
+                           total_count=len(rows),
+                           businesses=businesses,
+                           pagination=pagination,
+                           cities=get_top_cities(state_info['abbr']),
+                           city_count=len(get_state_cities(state_info['abbr'])))
+
+@app.route('/directory/<state_name>/<city_name>')
+@cached_page
+def city_page(state_name, city_name):
+    """Directory of a city's businesses and the other large cities in its state"""
+    state_info = resolve_state(state_name)
+    if state_info is None:
+        return "State not found", 404
+    state_slug = state_slugs_by_abbr[state_info['abbr'].lower()]
+    city_slug = generate_seo_url(city_name)
+    rows = get_city_rows(state_info['abbr'], city_slug)
+    if len(rows) == 0:
+        return "City not found", 404
+    if (state_name, city_name) != (state_slug, city_slug):
+        return redirect(with_query(url_for('city_page', state_name=state_slug, city_name=city_slug)), code=301)
+
+    page, limit = get_page_args(DIRECTORY_PAGE_SIZE)
+    businesses, pagination = paginate_rows(rows, page, limit)
+    if pagination is None:
+        return "Page not found", 404
+    add_page_urls(pagination, DIRECTORY_PAGE_SIZE)
+
+    # Related cities come precomputed; fall back to the state's largest cities
+    other_cities = (get_related_cities(state_info['abbr'], city_slug)
+                    or [city for city in get_top_cities(state_info['abbr']) if city['slug'] != city_slug])
+    return render_template('city.html',
+                           state=state_info['name'],
+                           state_slug=state_slug,
+                           city=get_dataset().index['city_names'][(state_info['abbr'].lower(), city_slug)],
+                           total_count=len(rows),
+                           businesses=businesses,
+                           pagination=pagination,
+                           other_cities=other_cities[:TOP_CITIES_PER_STATE - 1],
+                           nearby_cities=get_nearby_cities(state_info['abbr'], city_slug),
+                           city_count=len(get_state_cities(state_info['abbr'])))
+
+@app.route('/api/businesses')
+def api_businesses():
+    """One page of businesses in a state or city, as JSON, best rated first"""
+    state_info = resolve_state(request.args.get('state', ''))
+    if state_info is None:
+        return jsonify({'error': 'Unknown or missing state'}), 400
+
+    city = request.args.get('city', '').strip()
+    if city:
+        rows = get_city_rows(state_info['abbr'], generate_seo_url(city))
+    else:
+        rows = get_state_rows(state_info['abbr'])
+
+    page, limit = get_page_args()
+    businesses, pagination = paginate_rows(rows, page, limit, cards=False)
+    if pagination is None:
+        return jsonify({'error': 'Page out of range'}), 404
+    return jsonify({**pagination, 'businesses': businesses})
 
 @app.route('/pricing')
 def pricing():
@@ -211,51 +1408,265 @@ def blog():
                          title="LLC Formation Blog - Expert Insights",
                          meta_description="Stay informed with the latest LLC formation tips, legal updates, and business advice from our expert team.")
 
+STATIC_SITEMAP_PAGES = [
+    ('/', 'daily', '1.0'),
+    ('/llc-formation', 'weekly', '0.9'),
+    ('/pricing', 'weekly', '0.8'),
+    ('/about', 'monthly', '0.7'),
+    ('/contact', 'monthly', '0.7'),
+    ('/blog', 'weekly', '0.6'),
+]
+
+def get_sitemap_entries():
+    """Return every sitemap URL as (path, changefreq, priority), built once per data version"""
+    current = get_dataset()
+    if current.sitemap_entries is not None:
+        return current.sitemap_entries
+
+    entries = list(STATIC_SITEMAP_PAGES)
+    entries += [(f'/state/{state_slug}', 'monthly', '0.8') for state_slug in states_data]
+
+    # City pages come straight from the index, so they match the routes' slugs
+    for state_slug, state_info in states_data.items():
+        entries += [(f"/city/{state_slug}/{city['slug']}", 'monthly', '0.7')
+                    for city in get_state_cities(state_info['abbr'])]
+
+    current.sitemap_entries = entries
+    return entries
+
+def _sitemap_lastmod():
+    """Date reported as <lastmod>: when the loaded CSV was last modified"""
+    return (get_dataset().data_modified or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+def iter_sitemap_urlset(host_url, entries):
+    """Yield a <urlset> document for the given entries in small chunks"""
+    base = xml_escape(host_url.rstrip('/'))
+    lastmod = _sitemap_lastmod()
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for path, changefreq, priority in entries:
+        yield (f'  <url>\n    <loc>{base}{xml_escape(path)}</loc>\n    <lastmod>{lastmod}</lastmod>\n'
+               f'    <changefreq>{changefreq}</changefreq>\n    <priority>{priority}</priority>\n  </url>\n')
+    yield '</urlset>'
+
+def iter_sitemap_index(host_url, shard_count):
+    """Yield a <sitemapindex> document pointing at each child sitemap"""
+    base = xml_escape(host_url.rstrip('/'))
+    lastmod = _sitemap_lastmod()
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for shard in range(1, shard_count + 1):
+        yield (f'  <sitemap>\n    <loc>{base}/sitemap-{shard}.xml</loc>\n'
+               f'    <lastmod>{lastmod}</lastmod>\n  </sitemap>\n')
+    yield '</sitemapindex>'
+
+def _sitemap_response(cache_key, chunks):
+    """Serve a sitemap document from cache, or stream it while filling the cache"""
+    current = get_dataset()
+    etag = hashlib.md5(f'{current.version}:{cache_key}'.encode()).hexdigest()
+    cached = current.sitemap_cache.get(cache_key)
+    if cached is not None:
+        response = app.response_class(cached[0], mimetype='application/xml')
+    else:
+        def generate():
+            parts = []
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                parts.append(data)
+                yield data
+            current.sitemap_cache.set(cache_key, current.version, (b''.join(parts), etag, 'application/xml'))
+        response = app.response_class(generate(), mimetype='application/xml')
+
+    response.set_etag(etag)
+    if current.data_modified is not None:
+        response.last_modified = current.data_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
 @app.route('/sitemap.xml')
 def sitemap():
-    """Generate XML sitemap for SEO"""
-    sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    sitemap += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    
-    # Add static pages
-    pages = [
-        {'url': '/', 'priority': '1.0', 'changefreq': 'daily'},
-        {'url': '/llc-formation', 'priority': '0.9', 'changefreq': 'weekly'},
-        {'url': '/pricing', 'priority': '0.8', 'changefreq': 'weekly'},
-        {'url': '/about', 'priority': '0.7', 'changefreq': 'monthly'},
-        {'url': '/contact', 'priority': '0.7', 'changefreq': 'monthly'},
-        {'url': '/blog', 'priority': '0.6', 'changefreq': 'weekly'}
-    ]
-    
-    for page in pages:
-        sitemap += f'  <url>\n    <loc>{request.host_url.rstrip("/")}{page["url"]}</loc>\n    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>\n    <changefreq>{page["changefreq"]}</changefreq>\n    <priority>{page["priority"]}</priority>\n  </url>\n'
-    
-    # Add state pages
-    for state_slug in states_data.keys():
-        sitemap += f'  <url>\n    <loc>{request.host_url.rstrip("/")}/state/{state_slug}</loc>\n    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>\n    <changefreq>monthly</changefreq>\n    <priority>0.8</priority>\n  </url>\n'
-    
-    # Add city pages if we have LLC data
-    if llc_data is not None:
-        # Get unique city-state combinations
-        city_states = llc_data[['city', 'state', 'us_state']].dropna().drop_duplicates()
-        for _, row in city_states.iterrows():
-            city = row['city']
-            state_abbr = row['state'] if pd.notna(row['state']) else row['us_state']
-            
-            # Find matching state slug
-            state_slug = None
-            for slug, state_info in states_data.items():
-                if state_info['abbr'].lower() == state_abbr.lower():
-                    state_slug = slug
-                    break
-            
-            if state_slug and city:
-                city_slug = generate_seo_url(city)
-                sitemap += f'  <url>\n    <loc>{request.host_url.rstrip("/")}/city/{state_slug}/{city_slug}</loc>\n    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>\n    <changefreq>monthly</changefreq>\n    <priority>0.7</priority>\n  </url>\n'
-    
-    sitemap += '</urlset>'
-    
-    return app.response_class(sitemap, mimetype='application/xml')
+    """Generate XML sitemap for SEO, or a sitemap index when there are too many URLs"""
+    entries = get_sitemap_entries()
+    host_url = request.host_url
+    if len(entries) <= SITEMAP_MAX_URLS:
+        return _sitemap_response((host_url, 0), iter_sitemap_urlset(host_url, entries))
+
+    shard_count = -(-len(entries) // SITEMAP_MAX_URLS)
+    return _sitemap_response((host_url, 'index'), iter_sitemap_index(host_url, shard_count))
+
+@app.route('/sitemap-<int:shard>.xml')
+def sitemap_shard(shard):
+    """Child sitemap holding one SITEMAP_MAX_URLS-sized slice of the URLs"""
+    entries = get_sitemap_entries()
+    start = (shard - 1) * SITEMAP_MAX_URLS
+    if shard < 1 or start >= len(entries) or len(entries) <= SITEMAP_MAX_URLS:
+        return "Sitemap not found", 404
+
+    host_url = request.host_url
+    shard_entries = entries[start:start + SITEMAP_MAX_URLS]
+    return _sitemap_response((host_url, shard), iter_sitemap_urlset(host_url, shard_entries))
+
+def get_export_rows(state='', city='', category=''):
+    """Row positions matching optional state, city and category filters, best ranked first.
+
+    Raises ValueError naming the filter that matched nothing known.
+    """
+    data = get_dataset().data
+    if data is None:
+        return _NO_ROWS
+    if state:
+        state_info = resolve_state(state)
+        if state_info is None:
+            raise ValueError('Unknown state')
+        if city:
+            rows = get_city_rows(state_info['abbr'], generate_seo_url(city))
+        else:
+            rows = get_state_rows(state_info['abbr'])
+    elif city:
+        raise ValueError('A city filter needs a state')
+    else:
+        rows = np.arange(len(data))
+    if category:
+        categories = [str(name).lower() for name in data['category'].cat.categories]
+        if category.strip().lower() not in categories:
+            raise ValueError('Unknown category')
+        code = categories.index(category.strip().lower())
+        rows = rows[data['category'].cat.codes.to_numpy()[rows] == code]
+    return rows
+
+@app.route('/api/export')
+def api_export():
+    """Stream businesses matching state/city/category filters as NDJSON or CSV.
+
+    Requires 'Authorization: Bearer <EXPORT_TOKEN>'. `format` is ndjson
+    (default) or csv, `limit` caps the row count, and the body is gzipped
+    as it streams when the client accepts gzip or passes gzip=1.
+    """
+    token = app.config['EXPORT_TOKEN']
+    if not token:
+        return "Not found", 404
+    if not bearer_token_matches(token):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    limit = request.args.get('limit', type=int)
+    if (limit is None and 'limit' in request.args) or (limit is not None and limit < 0):
+        return jsonify({'error': 'limit must be a non-negative integer'}), 400
+    try:
+        with timed('filter'):
+            rows = get_export_rows(request.args.get('state', ''), request.args.get('city', '').strip(),
+                                   request.args.get('category', ''))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if limit is not None:
+        rows = rows[:limit]
+
+    compress = request.args.get('gzip', '') in ('1', 'true') or bool(request.accept_encodings['gzip'])
+    # The generator holds on to this request's dataset, so a reload mid-export doesn't mix versions
+    current = get_dataset()
+    body = encode_chunks(iter_export(current.data, rows, fmt), compress, app.config['COMPRESS_LEVEL'])
+    response = app.response_class(body, mimetype=EXPORT_FORMATS[fmt])
+    name = '-'.join(['llc'] + [generate_seo_url(request.args[key]) for key in ('state', 'city', 'category')
+                               if request.args.get(key, '').strip()])
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    response.headers['X-Export-Rows'] = str(len(rows))
+    response.headers['X-Data-Version'] = current.version
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+@app.route('/api/search')
+def api_search():
+    """Search suggestions by name, category or city, best rated first"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int), 1), SEARCH_MAX_LIMIT)
+    current = get_dataset()
+    if len(query) < 2 or current.search_index is None:
+        return jsonify([])
+
+    rows = None
+    state = request.args.get('state', '').strip()
+    city = request.args.get('city', '').strip()
+    if state:
+        state_info = resolve_state(state)
+        if state_info is None:
+            return jsonify([])
+        if city:
+            rows = get_city_rows(state_info['abbr'], generate_seo_url(city))
+        else:
+            rows = get_state_rows(state_info['abbr'])
+
+    with timed('filter'):
+        matches = current.data.iloc[current.search_index.search(query, limit=limit, rows=rows)]
+    with timed('serialize'):
+        records = to_records(matches[['name', 'category', 'city', 'state', 'us_state', 'rating', 'reviews']])
+    results = []
+    for business in records:
+        results.append({
+            'name': business['name'],
+            'category': business['category'],
+            'city': business['city'],
+            'state': business['state'] or business['us_state'],
+            'rating': business['rating'],
+            'reviews': business['reviews'],
+        })
+    return jsonify(results)
+
+def cached_json(cache_key, build):
+    """Serve the JSON for `build()`, serialized once per data version, with an ETag and a day's max-age"""
+    api_cache = get_dataset().api_cache
+    cached = api_cache.get(cache_key)
+    if cached is None:
+        body = json.dumps(build(), separators=(',', ':')).encode('utf-8')
+        cached = (body, hashlib.md5(body).hexdigest())
+        api_cache[cache_key] = cached
+
+    body, etag = cached
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+@app.route('/api/cities')
+def api_cities():
+    """City names in a state for the search form, or name/slug/count objects with counts=1"""
+    state_info = resolve_state(request.args.get('state', ''))
+    state_abbr = state_info['abbr'].lower() if state_info else ''
+    with_counts = request.args.get('counts', '') in ('1', 'true')
+
+    def build():
+        cities = get_state_cities(state_abbr) if state_abbr else []
+        return cities if with_counts else [city['city'] for city in cities]
+    return cached_json(('cities', state_abbr, with_counts), build)
+
+@app.route('/api/stats/<state>')
+@app.route('/api/stats/<state>/<city>')
+def api_stats(state, city=None):
+    """Business count, average rating, review total and top categories for a state or city"""
+    state_info = resolve_state(state)
+    if state_info is None:
+        return jsonify({'error': 'Unknown state'}), 404
+    abbr = state_info['abbr'].lower()
+    payload = {'state': state_info['name'], 'state_slug': state_slugs_by_abbr[abbr]}
+    if city:
+        city_slug = generate_seo_url(city)
+        stats = get_city_stats(abbr, city_slug)
+        if stats is None:
+            return jsonify({'error': 'Unknown city'}), 404
+        payload.update(city=get_dataset().index['city_names'][(abbr, city_slug)], city_slug=city_slug)
+    else:
+        city_slug = None
+        stats = get_state_stats(abbr) or GroupStats.empty()
+        payload['cities'] = len(get_state_cities(abbr))
+    return cached_json(('stats', abbr, city_slug), lambda: {**payload, **stats})
 
 @app.route('/robots.txt')
 def robots():
@@ -379,13 +1790,87 @@ def get_city_structured_data(state_info, city_name):
         }
     }
 
+@app.cli.command('memory-report')
+def memory_report_command():
+    """Print the loaded dataset's memory use per column, to help size workers"""
+    ensure_data_loaded()
+    data = get_dataset().data
+    if data is None:
+        print("No LLC data loaded")
+        return
+    report = memory_report(data)
+    for column, size in sorted(report.items(), key=lambda item: -item[1]):
+        print(f"{column:<14} {str(data[column].dtype):<10} {size / 1024 ** 2:10.1f} MB")
+    print(f"{'total':<25} {sum(report.values()) / 1024 ** 2:10.1f} MB ({len(data)} rows)")
+
+@app.cli.command('share-data')
+def share_data_command():
+    """Build the shared dataset file in LLC_SHARED_DIR ahead of starting workers"""
+    if not app.config['LLC_SHARED_DIR']:
+        print("LLC_SHARED_DIR is not set")
+        return
+    require_data_loaded()
+    print(f"Shared dataset ready at {get_shared_path(get_dataset().version)}")
+
+@app.cli.command('export')
+@click.argument('output', default='-')
+@click.option('--state', default='', help='State slug, abbreviation or name.')
+@click.option('--city', default='', help='City name or slug (needs --state).')
+@click.option('--category', default='', help='Exact category, case-insensitive.')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--limit', type=click.IntRange(min=0), default=None, help='Export at most this many rows.')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output (implied by a .gz OUTPUT).')
+def export_command(output, state, city, category, fmt, limit, compress):
+    """Write businesses matching the filters to OUTPUT ('-' for stdout), best ranked first"""
+    # Keep load messages out of an export written to stdout
+    with redirect_stdout(sys.stderr):
+        require_data_loaded()
+    try:
+        rows = get_export_rows(state, city, category)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if limit is not None:
+        rows = rows[:limit]
+    compress = compress or output.endswith('.gz')
+    chunks = encode_chunks(iter_export(get_dataset().data, rows, fmt), compress, app.config['COMPRESS_LEVEL'])
+    with click.open_file(output, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    if output != '-':
+        print(f"Exported {len(rows)} businesses to {output}")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress the CSS, JS and icons into static/dist"""
+    manifest = build_assets(app.static_folder)
+    for path, built in manifest.items():
+        print(f"{path} -> {built}")
+
+@app.cli.command('warm-templates')
+def warm_templates_command():
+    """Compile every template into TEMPLATE_CACHE_DIR"""
+    print(f"Compiled {warm_templates()} templates into {app.config['TEMPLATE_CACHE_DIR'] or 'memory only'}")
+
+@app.cli.command('prerender')
+@click.argument('output_dir', default='build')
+@click.option('--base-url', default='http://localhost/', help='Site URL used in canonical links and the sitemap.')
+@click.option('--workers', type=int, default=None, help='Render processes (defaults to the CPU count).')
+@click.option('--incremental', is_flag=True, help="Only re-render pages whose rows changed since the last run.")
+def prerender_command(output_dir, base_url, workers, incremental):
+    """Render every page, sitemap.xml and robots.txt to OUTPUT_DIR as static files"""
+    from prerender import prerender_site
+
+    summary = prerender_site(output_dir, base_url, workers=workers, incremental=incremental)
+    print(f"Rendered {summary['rendered']} files, skipped {summary['skipped']} unchanged pages")
+    for path, status in summary['failed']:
+        print(f"Failed to render {path}: HTTP {status}")
+
 if __name__ == '__main__':
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
     # Load data on startup
-    load_states_data()
-    load_llc_data()
+    configure_app({'LLC_PRELOAD': True})
     
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Built assets go in this subdirectory of the static folder, listed in its manifest
+ASSET_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSETS = ['css/style.css', 'css/favicon.css', 'js/main.js', 'favicon.ico', 'favicon.svg', 'site.webmanifest']
+# Hex digits of the content hash kept in fingerprinted names
+HASH_LENGTH = 10
+# Variants smaller than this are not worth a request header round trip
+MIN_COMPRESS_BYTES = 256
+
+
+# A quoted CSS string or a comment, matched together so that quotes inside comments and
+# comment markers inside strings are not mistaken for the other
+_CSS_STRING_OR_COMMENT = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|/\*.*?\*/', re.S)
+
+
+def minify_css(text):
+    """Drop comments and the whitespace around CSS punctuation, leaving quoted strings as written"""
+    strings = []
+
+    def protect(match):
+        if match.group().startswith('/*'):
+            return ' '
+        strings.append(match.group())
+        return f'\0{len(strings) - 1}\0'
+
+    text = _CSS_STRING_OR_COMMENT.sub(protect, text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    text = text.replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], text)
+
+
+def minify_svg(text):
+    """Drop XML comments and whitespace between tags"""
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    return re.sub(r'>\s+<', '><', text).strip()
+
+
+def minify_json(text):
+    return json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False)
+
+
+# JavaScript is copied as written: stripping it safely needs a real parser, and gzip/brotli
+# already remove most of what whitespace and comments cost
+MINIFIERS = {'.css': minify_css, '.svg': minify_svg, '.webmanifest': minify_json}
+
+
+def fingerprint(path, content):
+    """css/style.css -> css/style.<hash>.css"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def build_assets(static_dir, assets=ASSETS):
+    """Minify, fingerprint and precompress `assets` into static_dir/dist.
+
+    Writes each asset as dist/<path with hash>, plus .gz and (when the
+    brotli package is installed) .br variants when they are smaller, and
+    a manifest mapping every source path to its built path relative to
+    `static_dir`. The previous build is replaced. Returns the manifest.
+    """
+    output_dir = os.path.join(static_dir, ASSET_DIR)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    manifest = {}
+    for path in assets:
+        source = os.path.join(static_dir, path)
+        if not os.path.exists(source):
+            continue
+        with open(source, 'rb') as f:
+            content = f.read()
+        minify = MINIFIERS.get(os.path.splitext(path)[1])
+        if minify:
+            content = minify(content.decode('utf-8')).encode('utf-8')
+
+        built = f'{ASSET_DIR}/{fingerprint(path, content)}'
+        target = os.path.join(static_dir, built)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        if len(content) >= MIN_COMPRESS_BYTES:
+            variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(content, quality=11)
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(content):
+                    with open(target + suffix, 'wb') as f:
+                        f.write(compressed)
+        manifest[path] = built
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir):
+    """Source path -> built path from the last build, or {} when assets haven't been built"""
+    try:
+        with open(os.path.join(static_dir, ASSET_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+if __name__ == '__main__':
+    # python assets.py [static_dir]
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for path, built in build_assets(static_dir).items():
+        sizes = [os.path.getsize(os.path.join(static_dir, name))
+                 for name in (path, built, built + '.gz', built + '.br')
+                 if os.path.exists(os.path.join(static_dir, name))]
+        print(f"{path:<20} -> {built:<36} {' / '.join(str(size) for size in sizes)} bytes")
@@ -0,0 +1,316 @@
+"""Benchmark the directory on synthetic data.
+
+    python benchmark.py                                   # 10k, 1M and 5M rows
+    python benchmark.py --rows 10000 --output bench.json
+    python benchmark.py --rows 10000 --baseline bench.json  # exit 1 on regressions
+
+Each dataset is measured in a fresh interpreter: import time, data load
+time with and without the Feather cache, and then p50/p99 latency,
+throughput, resident memory growth and peak RSS for every route, driven
+through the Flask test client. Generated CSVs are kept in --data-dir and reused by later runs.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from ingest import US_STATES
+
+DEFAULT_ROWS = [10000, 1000000, 5000000]
+DEFAULT_REQUESTS = 200
+# Requests per route that are sent before timing starts
+WARMUP_REQUESTS = 5
+# Paths sampled per route; requests cycle through them
+SAMPLE_PATHS = 20
+GENERATE_CHUNK = 500000
+
+CSV_COLUMNS = ['name', 'category', 'full_address', 'phone', 'site', 'rating', 'reviews', 'about',
+               'description', 'city', 'state', 'us_state', 'postal_code', 'latitude', 'longitude']
+CATEGORIES = ['Accountant', 'Business attorney', 'Tax preparation service', 'Bookkeeping service',
+              'Registered agent', 'Notary public', 'Financial planner', 'Insurance agency',
+              'Real estate agency', 'Marketing agency', 'Web designer', 'Consultant', 'Plumber',
+              'Electrician', 'General contractor', 'Dentist', 'Auto repair shop', 'Restaurant',
+              'Hair salon', 'Cleaning service']
+NAME_WORDS = ['Acme', 'Summit', 'Pioneer', 'Liberty', 'Keystone', 'Evergreen', 'Harbor', 'Granite',
+              'Beacon', 'Cardinal', 'Frontier', 'Heritage', 'Legacy', 'Meridian', 'Northstar', 'Oak']
+CITY_PREFIXES = ['Spring', 'Oak', 'Cedar', 'River', 'Lake', 'Green', 'Fair', 'Maple', 'Pine', 'Clear',
+                 'Rock', 'Silver', 'West', 'East', 'North', 'South', 'New', 'Mount', 'Fort', 'St.']
+CITY_SUFFIXES = ['field', 'ville', 'wood', 'dale', ' Falls', ' Springs', 'ton', ' Hills', ' Park',
+                 'port', ' City', ' Creek', 'burg', ' Heights', 'view']
+
+
+def generate_csv(path, rows, seed=0):
+    """Write a synthetic CSV with the real file's columns, in chunks to bound memory.
+
+    Cities follow a long-tailed size distribution, and states are written as
+    abbreviations, full names or only in `us_state`, like the real export.
+    About a quarter of the rows have no rating.
+    """
+    rng = np.random.default_rng(seed)
+    abbrs = np.array(list(US_STATES))
+    cities = np.array([prefix + suffix for prefix in CITY_PREFIXES for suffix in CITY_SUFFIXES])
+    city_states = rng.integers(0, len(abbrs), len(cities))
+    weights = 1 / (np.arange(len(cities)) + 10)
+    weights /= weights.sum()
+    names = np.array(list(US_STATES.values()))
+
+    with open(f'{path}.tmp', 'w', newline='') as f:
+        for start in range(0, rows, GENERATE_CHUNK):
+            n = min(GENERATE_CHUNK, rows - start)
+            row_ids = np.arange(start, start + n).astype(str)
+            city = rng.choice(len(cities), n, p=weights)
+            state = city_states[city]
+            category = rng.integers(0, len(CATEGORIES), n)
+            state_format = rng.random(n)
+            rating = np.round(rng.uniform(1, 5, n), 1)
+            rating[rng.random(n) < 0.25] = np.nan
+
+            chunk = pd.DataFrame({
+                'name': (pd.Series(np.array(NAME_WORDS)[rng.integers(0, len(NAME_WORDS), n)]) + ' '
+                         + np.array(CATEGORIES)[category] + ' ' + row_ids),
+                'category': np.array(CATEGORIES)[category],
+                'full_address': pd.Series(row_ids) + ' Main St, ' + cities[city] + ', ' + abbrs[state],
+                'phone': '555-' + pd.Series(rng.integers(0, 10000, n)).astype(str).str.zfill(4),
+                'site': 'https://example.com/' + pd.Series(row_ids),
+                'rating': rating,
+                'reviews': np.where(np.isnan(rating), 0, rng.integers(1, 500, n)),
+                'about': 'Serving local businesses since ' + pd.Series(rng.integers(1950, 2024, n)).astype(str),
+                'description': 'Trusted ' + np.char.lower(np.array(CATEGORIES)[category]) + ' in ' + cities[city],
+                'city': cities[city],
+                'state': np.where(state_format < 0.7, abbrs[state],
+                                  np.where(state_format < 0.9, names[state], '')),
+                'us_state': names[state],
+                'postal_code': pd.Series(rng.integers(10000, 99999, n)).astype(str),
+                'latitude': np.round(rng.uniform(25, 49, n), 6),
+                'longitude': np.round(rng.uniform(-124, -67, n), 6),
+            }, columns=CSV_COLUMNS)
+            chunk.to_csv(f, header=start == 0, index=False)
+    os.replace(f'{path}.tmp', path)
+
+
+def dataset_path(data_dir, rows, seed):
+    return os.path.join(data_dir, f'llc-{rows}-{seed}.csv')
+
+
+def peak_rss_mb():
+    """The process's RSS high-water mark so far, which never goes down"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def current_rss_mb():
+    """Resident memory right now from /proc/self/statm, or None where that isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2, 1)
+
+
+def _remove_cache(csv_file):
+    import app as site
+    for path in site.get_llc_cache_paths(csv_file) + (site.get_quality_report_path(csv_file),):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def sample_routes(site, rng):
+    """Paths to request for each benchmarked route, sampled from the loaded data"""
+    states = [(slug, info['abbr']) for slug, info in site.states_data.items()
+              if len(site.get_state_rows(info['abbr']))]
+    state_paths, city_paths, cities_api = [], [], []
+    for slug, abbr in states:
+        state_paths.append(f'/state/{slug}')
+        cities_api.append(f'/api/cities?state={abbr}&counts=1')
+        city_paths += [f"/city/{slug}/{city['slug']}" for city in site.get_state_cities(abbr)]
+
+    data = site.get_dataset().data
+    terms = [str(category).split()[0].lower() for category in data['category'].cat.categories]
+    search_paths = [f'/api/search?q={term[:4]}' for term in terms]
+    search_paths += [f'/api/search?q={term}&state={abbr}' for term, (_, abbr) in zip(terms, states)]
+
+    def pick(paths):
+        if len(paths) <= SAMPLE_PATHS:
+            return paths
+        return [paths[i] for i in rng.choice(len(paths), SAMPLE_PATHS, replace=False)]
+
+    return {
+        'state': pick(state_paths),
+        'city': pick(city_paths),
+        'sitemap': ['/sitemap.xml'],
+        'search_api': pick(search_paths),
+        'cities_api': pick(cities_api),
+    }
+
+
+def time_route(client, paths, requests):
+    """Latency percentiles, throughput and RSS growth for `requests` requests cycling through `paths`.
+
+    `rss_delta_mb` is how much resident memory grew across this route's
+    requests (caches it filled, say); `peak_rss_mb` is the process-wide
+    high-water mark, which earlier routes and the data load also count in.
+    """
+    rss_before = current_rss_mb()
+    for path in paths[:WARMUP_REQUESTS]:
+        client.get(path)
+    latencies = np.empty(requests)
+    errors = 0
+    started = time.perf_counter()
+    for i in range(requests):
+        path = paths[i % len(paths)]
+        request_started = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        latencies[i] = time.perf_counter() - request_started
+        errors += response.status_code != 200
+    elapsed = time.perf_counter() - started
+    rss_after = current_rss_mb()
+    return {
+        'requests': requests,
+        'errors': int(errors),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'mean_ms': round(float(latencies.mean()) * 1000, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'rss_delta_mb': None if rss_before is None else round(rss_after - rss_before, 1),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _measure(csv_file, cold, requests, page_cache, seed, results):
+    """Run in a fresh process: time the import and data load, then (unless cold) every route"""
+    started = time.perf_counter()
+    import app as site
+    import_s = time.perf_counter() - started
+    if cold:
+        _remove_cache(csv_file)
+
+    site.configure_app({'LLC_DATA_CSV': csv_file, 'PAGE_CACHE_MAX_BYTES': page_cache, 'PAGE_CACHE_PATH': None})
+    started = time.perf_counter()
+    site.ensure_data_loaded()
+    result = {
+        'import_s': round(import_s, 3),
+        'load_s': round(time.perf_counter() - started, 3),
+        'rss_after_load_mb': current_rss_mb() or peak_rss_mb(),
+        'records': len(site.get_dataset()),
+    }
+    if not cold:
+        client = site.app.test_client()
+        routes = sample_routes(site, np.random.default_rng(seed))
+        result['routes'] = {name: time_route(client, paths, requests) for name, paths in routes.items() if paths}
+    results.put(result)
+
+
+def measure(csv_file, cold, requests, page_cache, seed):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(csv_file, cold, requests, page_cache, seed, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def run(rows_list, data_dir, requests, page_cache, seed):
+    os.makedirs(data_dir, exist_ok=True)
+    datasets = []
+    for rows in rows_list:
+        csv_file = dataset_path(data_dir, rows, seed)
+        if not os.path.exists(csv_file):
+            started = time.perf_counter()
+            generate_csv(csv_file, rows, seed)
+            print(f"Generated {rows} rows in {time.perf_counter() - started:.1f}s")
+
+        cold = measure(csv_file, True, requests, page_cache, seed)
+        warm = measure(csv_file, False, requests, page_cache, seed)
+        datasets.append({
+            'rows': rows,
+            'records': warm['records'],
+            'csv_mb': round(os.path.getsize(csv_file) / 1024 ** 2, 1),
+            'import_s': warm['import_s'],
+            'cold_load_s': cold['load_s'],
+            'warm_load_s': warm['load_s'],
+            'rss_after_load_mb': warm['rss_after_load_mb'],
+            'routes': warm['routes'],
+        })
+        print_dataset(datasets[-1])
+    return {
+        'created': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'requests_per_route': requests,
+        'page_cache_max_bytes': page_cache,
+        'datasets': datasets,
+    }
+
+
+def print_dataset(dataset):
+    print(f"\n{dataset['rows']} rows ({dataset['csv_mb']} MB CSV): import {dataset['import_s']}s, "
+          f"load {dataset['cold_load_s']}s cold / {dataset['warm_load_s']}s cached, "
+          f"{dataset['rss_after_load_mb']} MB RSS")
+    print(f"  {'route':<12} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'RSS +MB':>9} {'peak MB':>9} {'errors':>7}")
+    for name, stats in dataset['routes'].items():
+        rss_delta = '-' if stats.get('rss_delta_mb') is None else stats['rss_delta_mb']
+        print(f"  {name:<12} {stats['p50_ms']:>9} {stats['p99_ms']:>9} {stats['throughput_rps']:>9} "
+              f"{rss_delta:>9} {stats['peak_rss_mb']:>9} {stats['errors']:>7}")
+
+
+def find_regressions(results, baseline, tolerance):
+    """Describe every latency or load time more than `tolerance` (a fraction) worse than the baseline"""
+    previous = {dataset['rows']: dataset for dataset in baseline['datasets']}
+    regressions = []
+    for dataset in results['datasets']:
+        before = previous.get(dataset['rows'])
+        if before is None:
+            continue
+        checks = [('cold_load_s', dataset['cold_load_s'], before['cold_load_s']),
+                  ('warm_load_s', dataset['warm_load_s'], before['warm_load_s'])]
+        for route, stats in dataset['routes'].items():
+            if route in before['routes']:
+                checks += [(f'{route} {key}', stats[key], before['routes'][route][key])
+                           for key in ('p50_ms', 'p99_ms')]
+        regressions += [f"{dataset['rows']} rows {name}: {old} -> {new}"
+                        for name, new, old in checks if old and new > old * (1 + tolerance)]
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the directory routes on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='requests per route')
+    parser.add_argument('--data-dir', default='bench-data', help='where generated CSVs are kept')
+    parser.add_argument('--page-cache', type=int, default=0,
+                        help='PAGE_CACHE_MAX_BYTES; 0 (default) measures rendering on every request')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON here')
+    parser.add_argument('--baseline', help='previous results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline, as a fraction')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.data_dir, args.requests, args.page_cache, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import zlib
+
+# Columns written by exports, in order; ones missing from the data are skipped
+EXPORT_COLUMNS = ['name', 'category', 'full_address', 'city', 'state', 'us_state', 'phone', 'site',
+                  'rating', 'reviews', 'latitude', 'longitude', 'about', 'description']
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+# Rows converted per chunk; bounds memory whatever the export size
+EXPORT_CHUNK_ROWS = 5000
+
+
+def iter_export(data, rows, fmt='ndjson', chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield the rows at positions `rows` as NDJSON or CSV text, one chunk of rows at a time.
+
+    Only `chunk_rows` rows are sliced out of the frame at once, so memory
+    stays flat however many rows are exported. Missing ratings and
+    coordinates are written as null (NDJSON) or empty (CSV).
+    """
+    columns = [column for column in EXPORT_COLUMNS if column in data.columns]
+    for start in range(0, len(rows), chunk_rows):
+        frame = data.iloc[rows[start:start + chunk_rows]][columns]
+        if fmt == 'csv':
+            yield frame.to_csv(index=False, header=start == 0, float_format='%.6f')
+        else:
+            yield frame.to_json(orient='records', lines=True, force_ascii=False, double_precision=6)
+    if len(rows) == 0 and fmt == 'csv':
+        yield ','.join(columns) + '\n'
+
+
+def encode_chunks(chunks, compress=False, level=6):
+    """UTF-8 encode text chunks, optionally as one gzip stream compressed as it goes"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
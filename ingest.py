@@ -0,0 +1,210 @@
+import json
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columns read from the CSV; the site never renders anything else
+LLC_COLUMNS = ['name', 'category', 'full_address', 'phone', 'site', 'rating', 'reviews',
+               'about', 'description', 'city', 'state', 'us_state', 'latitude', 'longitude']
+LLC_NUMERIC_COLUMNS = ['rating', 'reviews', 'latitude', 'longitude']
+# Low-cardinality text columns stored as categoricals
+LLC_CATEGORY_COLUMNS = ['category', 'city', 'state', 'us_state']
+# Rows matching an earlier row on all of these (ignoring case and spacing) are duplicates
+DEDUPE_COLUMNS = ['name', 'full_address', 'phone']
+# Rows parsed per chunk; memory is bounded by the cleaned output, not the raw file
+CHUNK_SIZE = 100000
+
+US_STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota',
+    'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia',
+    'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+}
+# Lowercased abbreviation or full name -> abbreviation
+_STATE_LOOKUP = {**{abbr.lower(): abbr for abbr in US_STATES},
+                 **{name.lower(): abbr for abbr, name in US_STATES.items()}}
+
+# Distinct raw state values listed in the report
+REPORT_STATE_VALUES = 100
+# Cities listed in the report, overall and per state
+REPORT_TOP_CITIES = 20
+REPORT_TOP_CITIES_PER_STATE = 5
+
+
+def read_headers(csv_file):
+    """Column names of the CSV, without reading any rows"""
+    return pd.read_csv(csv_file, nrows=0).columns.tolist()
+
+
+def iter_llc_chunks(csv_file, chunksize=CHUNK_SIZE):
+    """Parse only the columns the site uses, `chunksize` rows at a time, text kept as strings"""
+    text_dtypes = {column: str for column in LLC_COLUMNS if column not in LLC_NUMERIC_COLUMNS}
+    return pd.read_csv(csv_file, usecols=lambda column: column in LLC_COLUMNS, dtype=text_dtypes,
+                       chunksize=chunksize)
+
+
+def normalize_states(values):
+    """Map state names or abbreviations (any case) to the two-letter abbreviation, '' if unknown.
+
+    Each distinct value is looked up once, so this stays cheap on large chunks.
+    """
+    distinct = values.astype('category')
+    keys = pd.Series(distinct.cat.categories.astype(str)).str.strip().str.lower()
+    abbrs = keys.str.replace(r'\s+', ' ', regex=True).map(_STATE_LOOKUP).fillna('').to_numpy()
+    # Code -1 (missing) picks the trailing ''
+    lookup = np.append(abbrs, '')
+    return pd.Series(lookup[distinct.cat.codes.to_numpy()], index=values.index)
+
+
+def _dedupe_hashes(data):
+    keys = data[DEDUPE_COLUMNS].apply(lambda column: column.str.strip().str.lower()
+                                      .str.replace(r'\s+', ' ', regex=True))
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def clean_chunk(chunk, stats):
+    """Apply the site's schema to one chunk of raw rows, counting what is fixed or dropped.
+
+    Text columns get '' for missing values, and the low-cardinality ones
+    become categoricals. `rating` becomes float32 with NaN when missing.
+    `reviews` becomes int32 with 0 when missing, and `latitude`/`longitude`
+    float32 with NaN when missing or out of range. Rows without a business
+    name are dropped. `state` becomes the canonical abbreviation from
+    `state`, falling back to `us_state`, and `us_state` is normalized the
+    same way.
+    """
+    data = chunk.copy()
+    for column in LLC_COLUMNS:
+        if column not in data:
+            data[column] = np.nan
+    data = data[LLC_COLUMNS]
+    stats['rows_read'] += len(data)
+    text_columns = [column for column in LLC_COLUMNS if column not in LLC_NUMERIC_COLUMNS]
+    data[text_columns] = data[text_columns].fillna('').astype(str)
+    data['rating'] = pd.to_numeric(data['rating'], errors='coerce').astype('float32')
+    data['reviews'] = pd.to_numeric(data['reviews'], errors='coerce').fillna(0).astype('int32')
+    for column, bound in (('latitude', 90), ('longitude', 180)):
+        values = pd.to_numeric(data[column], errors='coerce')
+        data[column] = values.where(values.abs() <= bound).astype('float32')
+
+    has_name = data['name'].str.strip() != ''
+    stats['missing_name'] += int((~has_name).sum())
+    data = data[has_name]
+
+    state = normalize_states(data['state'])
+    us_state = normalize_states(data['us_state'])
+    canonical = state.where(state != '', us_state)
+    raw = data['state'].where(data['state'].str.strip() != '', data['us_state'])
+    pairs = pd.DataFrame({'value': raw.str.strip(), 'state': canonical}).value_counts()
+    stats['state_values'].update(pairs.to_dict())
+    data['state'] = canonical
+    data['us_state'] = us_state
+
+    for column in LLC_CATEGORY_COLUMNS:
+        data[column] = data[column].astype('category')
+    return data, _dedupe_hashes(data)
+
+
+def _concat_chunks(chunks):
+    """Concatenate cleaned chunks, merging each categorical column's categories"""
+    data = pd.concat([chunk.drop(columns=LLC_CATEGORY_COLUMNS) for chunk in chunks], ignore_index=True)
+    for column in LLC_CATEGORY_COLUMNS:
+        data[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return data[LLC_COLUMNS]
+
+
+def ingest_csv(csv_file, chunksize=CHUNK_SIZE):
+    """Stream the CSV into the cleaned, compact, deduplicated frame, plus a data-quality report.
+
+    Returns `(data, report)`; see `build_report` for the report's fields.
+    """
+    stats = {'rows_read': 0, 'missing_name': 0, 'state_values': Counter()}
+    chunks, hashes = [], []
+    for chunk in iter_llc_chunks(csv_file, chunksize):
+        cleaned, chunk_hashes = clean_chunk(chunk, stats)
+        chunks.append(cleaned)
+        hashes.append(chunk_hashes)
+    if not chunks:
+        cleaned, chunk_hashes = clean_chunk(pd.DataFrame(columns=LLC_COLUMNS), stats)
+        chunks, hashes = [cleaned], [chunk_hashes]
+
+    data = _concat_chunks(chunks)
+    duplicate = pd.Series(np.concatenate(hashes)).duplicated().to_numpy()
+    stats['duplicates'] = int(duplicate.sum())
+    data = data[~duplicate].reset_index(drop=True)
+    for column in LLC_CATEGORY_COLUMNS:
+        data[column] = data[column].cat.remove_unused_categories()
+    return data, build_report(csv_file, data, stats)
+
+
+def build_report(csv_file, data, stats):
+    """Summarize an ingest run as a JSON-serializable dict.
+
+    `state_values` lists the most common raw state values and the
+    abbreviation each was normalized to; `states` gives each abbreviation's
+    business count and its largest cities.
+    """
+    has_state = data['state'].astype(str) != ''
+    has_city = data['city'].astype(str).str.strip() != ''
+    city_counts = (data[has_state & has_city].groupby(['state', 'city'], observed=True).size()
+                   .sort_values(ascending=False, kind='stable'))
+
+    states = {}
+    for (state, city), count in city_counts.items():
+        entry = states.setdefault(state, {'count': 0, 'top_cities': []})
+        if len(entry['top_cities']) < REPORT_TOP_CITIES_PER_STATE:
+            entry['top_cities'].append({'city': city, 'count': int(count)})
+    for state, count in data.loc[has_state, 'state'].value_counts().items():
+        if count:
+            states.setdefault(state, {'count': 0, 'top_cities': []})['count'] = int(count)
+
+    return {
+        'source': csv_file,
+        'columns': read_headers(csv_file),
+        'rows_read': stats['rows_read'],
+        'rows_kept': len(data),
+        'dropped': {'missing_name': stats['missing_name'], 'duplicates': stats['duplicates']},
+        'unknown_state': int((~has_state).sum()),
+        'missing_city': int((~has_city).sum()),
+        'missing_rating': int(data['rating'].isna().sum()),
+        'unique_cities': len(city_counts),
+        'state_values': [{'value': value, 'state': state, 'count': count}
+                         for (value, state), count in stats['state_values'].most_common(REPORT_STATE_VALUES)],
+        'states': dict(sorted(states.items())),
+        'top_cities': [{'state': state, 'city': city, 'count': int(count)}
+                       for (state, city), count in city_counts.head(REPORT_TOP_CITIES).items()],
+    }
+
+
+def summarize(report):
+    """One-line summary of an ingest report for load logs"""
+    dropped = report['dropped']
+    return (f"Ingested {report['rows_kept']} of {report['rows_read']} rows "
+            f"({dropped['duplicates']} duplicates and {dropped['missing_name']} without a name dropped, "
+            f"{report['unknown_state']} with an unknown state)")
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    # python ingest.py <csv> [output.feather] [report.json]
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else r'C:\Users\webd5\Downloads\LLC Data.csv'
+    data, report = ingest_csv(csv_file)
+    if len(sys.argv) > 2:
+        data.to_feather(sys.argv[2])
+    if len(sys.argv) > 3:
+        write_report(report, sys.argv[3])
+    print(summarize(report))
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLitePageStore:
+    """Rendered pages in a SQLite file shared by every worker on the host.
+
+    Rows carry the data version they were rendered from; rows from other
+    versions are dropped the first time a new version is written, and the
+    least recently written rows are dropped once the bodies exceed
+    `max_bytes`.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._version = None
+        self._writes = 0
+
+    def _connect(self):
+        """This thread's connection, opened on first use.
+
+        Connections are never opened in __init__ and are reopened after a
+        fork (gunicorn --preload builds the store in the master), since a
+        SQLite connection must not be shared across processes.
+        """
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS pages ('
+                       'key TEXT PRIMARY KEY, version TEXT, etag TEXT, mimetype TEXT, '
+                       'body BLOB, written REAL)')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT body, etag, mimetype FROM pages WHERE key = ?', (key,)).fetchone()
+        return None if row is None else (bytes(row[0]), row[1], row[2])
+
+    def set(self, key, version, entry):
+        body, etag, mimetype = entry
+        db = self._connect()
+        if version != self._version:
+            self._version = version
+            db.execute('DELETE FROM pages WHERE version != ?', (version,))
+        db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                   (key, version, etag, mimetype, body, time.time()))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop the oldest pages until the stored bodies fit in max_bytes"""
+        db = self._connect()
+        total = db.execute('SELECT COALESCE(SUM(LENGTH(body)), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in db.execute('SELECT key, LENGTH(body) FROM pages ORDER BY written').fetchall():
+            db.execute('DELETE FROM pages WHERE key = ?', (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+    def clear(self):
+        self._connect().execute('DELETE FROM pages')
+
+
+class PageCache:
+    """In-process LRU of rendered pages, bounded by total body size.
+
+    Entries are (body, etag, mimetype) tuples. An optional shared store
+    (see SQLitePageStore) backs the in-process cache so workers reuse each
+    other's renders. Hit and miss counts are kept for monitoring.
+    """
+
+    def __init__(self, max_bytes, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def set(self, key, version, entry):
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(key, version, entry)
+
+    def _remember(self, key, entry):
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[0])
+
+    def clear(self):
+        """Forget every in-process entry (the shared store prunes itself by version)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+            }
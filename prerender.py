@@ -0,0 +1,189 @@
+import hashlib
+import json
+import multiprocessing
+import os
+
+import pandas as pd
+from jinja2 import TemplateNotFound, meta
+
+import app as site
+
+MANIFEST_FILE = '.prerender-manifest.json'
+BATCH_SIZE = 200
+# Paths with these extensions are written as-is; every other page becomes <path>/index.html
+FILE_EXTENSIONS = ('.xml', '.txt')
+
+
+def output_file(output_dir, path):
+    """File a URL path is written to: /state/texas -> state/texas/index.html"""
+    path = path.strip('/')
+    if not path:
+        return os.path.join(output_dir, 'index.html')
+    if os.path.splitext(path)[1] in FILE_EXTENSIONS:
+        return os.path.join(output_dir, *path.split('/'))
+    return os.path.join(output_dir, *path.split('/'), 'index.html')
+
+
+def template_fingerprint(name, seen=None):
+    """Hash of a template and every template it extends, includes or imports"""
+    env = site.app.jinja_env
+    seen = set() if seen is None else seen
+    seen.add(name)
+    digest = hashlib.md5(name.encode())
+    try:
+        source = env.loader.get_source(env, name)[0]
+    except TemplateNotFound:
+        return digest.hexdigest()
+    digest.update(source.encode())
+    for child in sorted(ref for ref in meta.find_referenced_templates(env.parse(source)) if ref):
+        if child not in seen:
+            digest.update(template_fingerprint(child, seen).encode())
+    return digest.hexdigest()
+
+
+def _assets_fingerprint():
+    """Hash of the built asset manifest, which decides every page's asset URLs"""
+    return hashlib.md5(json.dumps(site.asset_manifest, sort_keys=True).encode()).hexdigest()
+
+
+def _static_template(path):
+    """Template rendered by one of the static pages: / -> index.html, /llc-formation -> llc_formation.html"""
+    return (path.strip('/').replace('-', '_') or 'index') + '.html'
+
+
+def listing_paths(base_path, total):
+    """Paths of every page of a listing: the base path, then <base>/page/2 ..."""
+    pages = max(-(-total // site.LISTING_PAGE_SIZE), 1)
+    return [base_path] + [f'{base_path}/page/{page}' for page in range(2, pages + 1)]
+
+
+def collect_pages():
+    """List every page as (path, fingerprint).
+
+    A page's fingerprint covers only what it is rendered from: its
+    templates, the asset manifest and, for state and city pages, the rows
+    of the state or city (every page of a listing shows the stats of all
+    of them) and, for cities, the related and nearby city links. In
+    incremental mode only pages whose fingerprint changed are rendered.
+    """
+    assets = _assets_fingerprint()
+    pages = [(path, hashlib.md5((template_fingerprint(_static_template(path)) + assets).encode()).hexdigest())
+             for path, _, _ in site.STATIC_SITEMAP_PAGES]
+
+    row_hashes = None
+    data = site.get_dataset().data
+    if data is not None:
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+    def fingerprint(template, rows, links=()):
+        digest = hashlib.md5((template + assets).encode())
+        if row_hashes is not None:
+            digest.update(row_hashes[rows].tobytes())
+        digest.update(json.dumps([(city['state_slug'], city['slug'], city['count']) for city in links]).encode())
+        return digest.hexdigest()
+
+    state_template = template_fingerprint('state_llc.html')
+    city_template = template_fingerprint('city_llc.html')
+    for state_slug, state_info in site.states_data.items():
+        abbr = state_info['abbr']
+        rows = site.get_state_rows(abbr)
+        page_fingerprint = fingerprint(state_template, rows)
+        pages += [(path, page_fingerprint) for path in listing_paths(f'/state/{state_slug}', len(rows))]
+        for city in site.get_state_cities(abbr):
+            rows = site.get_city_rows(abbr, city['slug'])
+            links = site.get_related_cities(abbr, city['slug']) + site.get_nearby_cities(abbr, city['slug'])
+            page_fingerprint = fingerprint(city_template, rows, links)
+            pages += [(path, page_fingerprint)
+                      for path in listing_paths(f"/city/{state_slug}/{city['slug']}", len(rows))]
+    return pages
+
+
+def _init_worker(config):
+    # Forked workers inherit the loaded data; spawned ones load it here
+    site.configure_app(config)
+    site.ensure_data_loaded()
+
+
+def _render_batch(job):
+    """Render a batch of paths with the test client and write them to disk"""
+    output_dir, base_url, paths = job
+    client = site.app.test_client()
+    results = []
+    for path in paths:
+        response = client.get(path, base_url=base_url)
+        if response.status_code == 200:
+            target = output_file(output_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(response.get_data())
+        results.append((path, response.status_code))
+    return results
+
+
+def _sitemap_paths():
+    entries = site.get_sitemap_entries()
+    paths = ['/sitemap.xml', '/robots.txt']
+    if len(entries) > site.SITEMAP_MAX_URLS:
+        shard_count = -(-len(entries) // site.SITEMAP_MAX_URLS)
+        paths += [f'/sitemap-{shard}.xml' for shard in range(1, shard_count + 1)]
+    return paths
+
+
+def prerender_site(output_dir, base_url, workers=None, incremental=False):
+    """Render the site to `output_dir` across a process pool.
+
+    Writes the static pages, every state and city page, sitemap.xml (and its
+    shards) and robots.txt. With `incremental`, pages whose fingerprint
+    matches the previous run's manifest are skipped (all pages are rendered
+    when the base URL differs from that run's), and files for pages that
+    no longer exist are removed (unless the dataset is empty). Raises
+    click.ClickException if the data can't be loaded. Returns a summary dict.
+    """
+    site.require_data_loaded()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    previous = {}
+    previous_base_url = None
+    if incremental and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        previous, previous_base_url = manifest.get('pages', {}), manifest.get('base_url')
+
+    pages = dict(collect_pages())
+    # Every page embeds the base URL in its canonical and structured-data links
+    unchanged = previous if previous_base_url == base_url else {}
+    todo = [path for path, fingerprint in pages.items() if unchanged.get(path) != fingerprint]
+    todo += _sitemap_paths()
+
+    # An empty dataset would make every state and city page look stale; keep them rather than wipe the site
+    if len(site.get_dataset()):
+        for path in set(previous) - set(pages):
+            target = output_file(output_dir, path)
+            if os.path.exists(target):
+                os.remove(target)
+
+    # Compile templates once here; forked workers inherit them, spawned ones read the bytecode cache
+    site.warm_templates()
+
+    # Workers render pages once each, so they skip the page cache entirely
+    config = {'LLC_DATA_CSV': site.app.config['LLC_DATA_CSV'],
+              'PAGE_CACHE_MAX_BYTES': 0, 'PAGE_CACHE_PATH': None}
+    jobs = [(output_dir, base_url, todo[i:i + BATCH_SIZE]) for i in range(0, len(todo), BATCH_SIZE)]
+    failed = []
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config,)) as pool:
+        for results in pool.imap_unordered(_render_batch, jobs):
+            failed += [(path, status) for path, status in results if status != 200]
+
+    failed_paths = {path for path, _ in failed}
+    manifest = {'base_url': base_url,
+                'pages': {path: fingerprint for path, fingerprint in pages.items() if path not in failed_paths}}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    return {
+        'pages': len(pages),
+        'rendered': len(todo) - len(failed),
+        'skipped': len(pages) - len(set(todo) & set(pages)),
+        'failed': failed,
+    }
@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def fold_stack(frame):
+    """Collapse a frame's stack into 'module:function;...' order, outermost first"""
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads from a background thread.
+
+    A request thread calls `start` when it begins and `stop` when it ends;
+    `stop` returns how often each folded stack was seen in between. The
+    sampler thread starts on first use in each process, since threads don't
+    survive fork.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self, thread_id):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='llc-profiler', daemon=True).start()
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._stacks.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._stacks:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[fold_stack(frame)] += 1
+
+
+def write_folded(stacks, path):
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
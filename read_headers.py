@@ -1,10 +1,11 @@
-import pandas as pd
+import sys
 
-# Read the CSV file
-df = pd.read_csv(r'C:\Users\webd5\Downloads\LLC Data.csv')
+from ingest import read_headers
+
+csv_file = sys.argv[1] if len(sys.argv) > 1 else r'C:\Users\webd5\Downloads\LLC Data.csv'
 
 # Get all headers
-headers = df.columns.tolist()
+headers = read_headers(csv_file)
 
 print('Complete CSV Headers:')
 print('=' * 60)
@@ -13,10 +14,3 @@ for i, header in enumerate(headers):
     print(f'{i+1:2d}. {header}')
 
 print(f'\nTotal columns: {len(headers)}')
-
-
-
-
-
-
-
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Related and nearby cities kept per city
+RELATED_CITIES = 12
+NEARBY_CITIES = 12
+# Each city is compared with this many of its state's largest cities
+CANDIDATE_CITIES = 50
+# Nearest-neighbour grid cell size, and how many rings of cells a search may widen to
+GRID_CELL_KM = 50.0
+MAX_GRID_RINGS = 8
+EARTH_RADIUS_KM = 6371.0
+
+
+def city_centroids(city_ids, rows, data, n_cities):
+    """Mean latitude and longitude of each city's rows as an (n, 2) array, or None without coordinates"""
+    if 'latitude' not in data or 'longitude' not in data:
+        return None
+    lat = data['latitude'].to_numpy(dtype=np.float64)[rows]
+    lng = data['longitude'].to_numpy(dtype=np.float64)[rows]
+    with np.errstate(invalid='ignore'):
+        valid = (np.abs(lat) <= 90) & (np.abs(lng) <= 180)
+    counts = np.bincount(city_ids[valid], minlength=n_cities)
+    if not counts.any():
+        return None
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.column_stack([np.bincount(city_ids[valid], weights=lat[valid], minlength=n_cities) / counts,
+                                np.bincount(city_ids[valid], weights=lng[valid], minlength=n_cities) / counts])
+
+
+def project(centroids):
+    """Sinusoidal projection to km, where straight-line distance is close to distance on the ground"""
+    lat = np.radians(centroids[:, 0])
+    return np.column_stack([EARTH_RADIUS_KM * np.radians(centroids[:, 1]) * np.cos(lat), EARTH_RADIUS_KM * lat])
+
+
+def nearest_neighbours(points, eligible, k=NEARBY_CITIES):
+    """The k nearest eligible points to every point, as an (n, k) id array padded with -1.
+
+    Points are bucketed into GRID_CELL_KM square cells. Each cell's points
+    are compared with the points in the surrounding cells, and the search
+    widens one ring of cells at a time until the k-th neighbour is closer
+    than anything outside the searched area (or MAX_GRID_RINGS is reached).
+    """
+    n = len(points)
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    located = np.flatnonzero(~np.isnan(points).any(axis=1))
+    if len(located) == 0:
+        return neighbours
+
+    cells = np.floor(points[located] / GRID_CELL_KM).astype(np.int64)
+    buckets = {}
+    for cell, point in zip(map(tuple, cells), located):
+        buckets.setdefault(cell, []).append(point)
+    buckets = {cell: np.array(members) for cell, members in buckets.items()}
+    candidates_by_cell = {cell: members[eligible[members]] for cell, members in buckets.items()}
+
+    for (cx, cy), members in buckets.items():
+        for rings in range(1, MAX_GRID_RINGS + 1):
+            candidates = [candidates_by_cell[cell] for cell in
+                          ((cx + dx, cy + dy) for dx in range(-rings, rings + 1) for dy in range(-rings, rings + 1))
+                          if cell in candidates_by_cell]
+            candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+            distances = np.linalg.norm(points[members][:, None, :] - points[candidates][None, :, :], axis=2)
+            distances[members[:, None] == candidates[None, :]] = np.inf
+            found = min(k, len(candidates))
+            if found == 0:
+                continue
+            nearest = np.argsort(distances, axis=1, kind='stable')[:, :found]
+            kth = np.take_along_axis(distances, nearest[:, -1:], axis=1)
+            if found == k and (kth <= rings * GRID_CELL_KM).all():
+                break
+        if found:
+            ranked = np.where(np.isfinite(np.take_along_axis(distances, nearest, axis=1)), candidates[nearest], -1)
+            neighbours[members, :found] = ranked
+    return neighbours
+
+
+def related_cities(state_groups, counts, top_categories, k=RELATED_CITIES):
+    """Rank each city's related cities in its state by shared top categories, then by size.
+
+    `state_groups` lists each state's city ids. Every city is scored against
+    its state's CANDIDATE_CITIES largest cities: one point per category the
+    two share in their top categories, plus up to one point for size.
+    Returns an (n, k) id array padded with -1.
+    """
+    related = np.full((len(counts), k), -1, dtype=np.int32)
+    for city_ids in state_groups:
+        city_ids = np.asarray(city_ids)
+        pool = city_ids[np.argsort(-counts[city_ids], kind='stable')[:CANDIDATE_CITIES]]
+        mine = top_categories[city_ids][:, None, :, None]
+        theirs = top_categories[pool][None, :, None, :]
+        shared = ((mine == theirs) & (mine >= 0)).sum(axis=(2, 3))
+        size = np.log1p(counts[pool]) / np.log1p(max(counts[pool].max(), 1))
+        scores = shared + size[None, :]
+        scores[city_ids[:, None] == pool[None, :]] = -np.inf
+
+        found = min(k, len(pool))
+        ranked = np.argsort(-scores, axis=1, kind='stable')[:, :found]
+        ranked_scores = np.take_along_axis(scores, ranked, axis=1)
+        related[city_ids, :found] = np.where(np.isfinite(ranked_scores), pool[ranked], -1)
+    return related
@@ -0,0 +1,106 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# Fields searched by /api/search
+SEARCH_FIELDS = ['name', 'category', 'city']
+# A prefix matching more terms than this only expands to the most common ones
+MAX_PREFIX_TERMS = 64
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """Inverted index over business rows with prefix completion.
+
+    Terms are kept in a sorted list, so the terms starting with a prefix
+    form one contiguous range found by bisection. Each term's postings are
+    the row positions containing it, stored back to back in one int32
+    array, sorted ascending. Rows are expected to be ordered best-first
+    (see `app.sort_by_rank`), so the first matches found are the top
+    ranked ones.
+    """
+
+    def __init__(self, terms, offsets, postings):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def build(cls, data, fields=SEARCH_FIELDS):
+        """Tokenize `fields` of every row in one vectorized pass"""
+        text = data[fields[0]].astype(str)
+        for field in fields[1:]:
+            text = text + ' ' + data[field].astype(str)
+        tokens = text.str.lower().str.findall(TOKEN_PATTERN.pattern).explode().dropna()
+
+        rows = tokens.index.to_numpy(dtype=np.int64)
+        codes, terms = pd.factorize(tokens.to_numpy(), sort=True)
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        # A term repeated within a row is posted once
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(terms)), out=offsets[1:])
+        return cls(list(terms), offsets, rows.astype(np.int32))
+
+    def _term_postings(self, term_id):
+        return self.postings[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def exact(self, term):
+        """Row positions containing exactly this term"""
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self._term_postings(i)
+        return self.postings[:0]
+
+    def prefix_terms(self, prefix):
+        """Ids of terms starting with prefix, limited to the MAX_PREFIX_TERMS most common"""
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + '\uffff', lo)
+        term_ids = np.arange(lo, hi)
+        if len(term_ids) > MAX_PREFIX_TERMS:
+            counts = self.offsets[lo + 1:hi + 1] - self.offsets[lo:hi]
+            term_ids = term_ids[np.argpartition(-counts, MAX_PREFIX_TERMS)[:MAX_PREFIX_TERMS]]
+        return term_ids
+
+    def search(self, query, limit=10, rows=None):
+        """Return up to `limit` best-ranked row positions matching every query token.
+
+        The last token matches as a prefix so partially typed words complete.
+        `rows` optionally restricts results to a sorted array of row positions
+        (e.g. one state or city).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return self.postings[:0]
+
+        candidates = rows
+        for term in sorted(set(tokens[:-1]), key=lambda t: len(self.exact(t))):
+            postings = self.exact(term)
+            candidates = postings if candidates is None else np.intersect1d(candidates, postings, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        term_ids = self.prefix_terms(tokens[-1])
+        if candidates is None:
+            # Every term's postings are rank ordered, so the top `limit` of the
+            # union is within the first `limit` entries of each term
+            heads = [self._term_postings(t)[:limit] for t in term_ids]
+            matches = np.unique(np.concatenate(heads)) if heads else self.postings[:0]
+        else:
+            mask = np.zeros(len(candidates), dtype=bool)
+            for t in term_ids:
+                mask |= np.isin(candidates, self._term_postings(t), assume_unique=True)
+            matches = candidates[mask]
+        return matches[:limit]
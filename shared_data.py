@@ -0,0 +1,117 @@
+import glob
+import mmap
+import os
+import pickle
+import struct
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'LLCSHM01'
+# Buffers start on cache-line boundaries so arrays mapped from them are aligned
+ALIGNMENT = 64
+_COUNTS = struct.Struct('<QQ')
+_SPAN = struct.Struct('<QQ')
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_shared(path, obj):
+    """Pickle `obj` to `path` with its array buffers stored raw, for `attach_shared`.
+
+    Uses pickle protocol 5, so NumPy arrays and Arrow buffers are written
+    out of band after the pickle body instead of being copied into it.
+    The file is written under a temporary name and renamed into place, so
+    readers never see a partial file.
+    """
+    buffers = []
+    body = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    views = [buffer.raw() for buffer in buffers]
+
+    offset = _align(len(MAGIC) + _COUNTS.size + _SPAN.size * len(views) + len(body))
+    spans = []
+    for view in views:
+        spans.append((offset, view.nbytes))
+        offset = _align(offset + view.nbytes)
+
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+        f.write(MAGIC)
+        f.write(_COUNTS.pack(len(body), len(views)))
+        for span in spans:
+            f.write(_SPAN.pack(*span))
+        f.write(body)
+        for (start, _), view in zip(spans, views):
+            f.write(b'\0' * (start - f.tell()))
+            f.write(view)
+    os.replace(tmp, path)
+    return offset
+
+
+def check_private(path):
+    """Raise PermissionError unless `path` belongs to this user and no one else can write it.
+
+    Attaching unpickles the file, so a file another local user could have
+    planted or changed would run their code. A no-op where os.getuid is
+    unavailable.
+    """
+    if not hasattr(os, 'getuid'):
+        return
+    stat = os.stat(path)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise PermissionError(f'{path} must be owned by this user and not writable by group or others')
+
+
+def attach_shared(path):
+    """Map a file written by `write_shared` and unpickle it without copying its buffers.
+
+    Arrays come back read-only and backed by the page cache, so every
+    process attaching the same file shares one copy of them. Only the
+    pickle body (dict keys, small objects) is materialized per process.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if view[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not a shared data file')
+    position = len(MAGIC)
+    body_size, buffer_count = _COUNTS.unpack_from(view, position)
+    position += _COUNTS.size
+    buffers = []
+    for _ in range(buffer_count):
+        start, size = _SPAN.unpack_from(view, position)
+        position += _SPAN.size
+        buffers.append(view[start:start + size])
+    return pickle.loads(view[position:position + body_size], buffers=buffers)
+
+
+@contextmanager
+def exclusive_lock(path):
+    """Hold an exclusive lock on `path` across processes (a no-op where fcntl is unavailable)"""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def remove_stale(pattern, keep):
+    """Delete files matching `pattern` other than `keep`.
+
+    Processes that still have a removed file mapped keep reading it until
+    they unmap it; only new attaches are affected.
+    """
+    for path in glob.glob(pattern):
+        if os.path.abspath(path) != os.path.abspath(keep):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -181,10 +181,14 @@ function displaySearchSuggestions(suggestions) {
     suggestions.forEach(suggestion => {
         const suggestionItem = document.createElement('div');
         suggestionItem.className = 'p-2 border-bottom cursor-pointer';
-        suggestionItem.innerHTML = `
-            <div class="fw-bold">${suggestion.name}</div>
-            <div class="small text-muted">${suggestion.city}, ${suggestion.state}</div>
-        `;
+        // Business names come straight from the CSV, so set them as text, never as HTML
+        const nameElement = document.createElement('div');
+        nameElement.className = 'fw-bold';
+        nameElement.textContent = suggestion.name;
+        const locationElement = document.createElement('div');
+        locationElement.className = 'small text-muted';
+        locationElement.textContent = `${suggestion.city}, ${suggestion.state}`;
+        suggestionItem.append(nameElement, locationElement);
         suggestionItem.addEventListener('click', () => {
             searchInput.value = suggestion.name;
             suggestionsContainer.remove();
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Categories listed per state or city
+TOP_CATEGORIES = 5
+
+
+def _average(sums, counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+class GroupStats:
+    """Business counts, ratings, review totals and top categories for groups of rows.
+
+    Every figure lives in an array indexed by group id, and `ids` maps each
+    group's key (a state abbreviation, or a (state, city slug) pair) to its
+    id, so a lookup is a dict access and a few array reads. `build` computes
+    all groups in one pass of bincounts over the rows.
+    """
+
+    def __init__(self, ids, counts, rated, average_ratings, review_totals,
+                 top_categories, top_counts, top_ratings, categories):
+        self.ids = ids
+        self.counts = counts
+        self.rated = rated
+        self.average_ratings = average_ratings
+        self.review_totals = review_totals
+        # Category codes per group, most businesses first, padded with -1
+        self.top_categories = top_categories
+        self.top_counts = top_counts
+        self.top_ratings = top_ratings
+        self.categories = categories
+
+    @classmethod
+    def build(cls, keys, group_ids, rows, data, top=TOP_CATEGORIES):
+        """Aggregate `data` rows at positions `rows`, row i belonging to group `group_ids[i]` of `keys`"""
+        n_groups = len(keys)
+        rating = data['rating'].to_numpy(dtype=np.float64)[rows]
+        reviews = data['reviews'].to_numpy(dtype=np.int64)[rows]
+        is_rated = ~np.isnan(rating)
+        rating = np.where(is_rated, rating, 0)
+
+        counts = np.bincount(group_ids, minlength=n_groups).astype(np.int32)
+        rated = np.bincount(group_ids, weights=is_rated, minlength=n_groups).astype(np.int32)
+        rating_sums = np.bincount(group_ids, weights=rating, minlength=n_groups)
+        review_totals = np.bincount(group_ids, weights=reviews, minlength=n_groups).astype(np.int64)
+
+        # Count each (group, category) pair, skipping rows without a category
+        categories = data['category'].cat.categories
+        n_categories = max(len(categories), 1)
+        category_codes = data['category'].cat.codes.to_numpy().astype(np.int64)[rows]
+        has_category = category_codes >= 0
+        blank = np.flatnonzero(categories.astype(str).str.strip() == '')
+        if len(blank):
+            has_category &= ~np.isin(category_codes, blank)
+        pair_keys, pair_ids = np.unique(group_ids[has_category].astype(np.int64) * n_categories
+                                        + category_codes[has_category], return_inverse=True)
+        pair_counts = np.bincount(pair_ids, minlength=len(pair_keys))
+        pair_rated = np.bincount(pair_ids, weights=is_rated[has_category], minlength=len(pair_keys))
+        pair_rating_sums = np.bincount(pair_ids, weights=rating[has_category], minlength=len(pair_keys))
+        pair_groups = pair_keys // n_categories
+        pair_categories = pair_keys % n_categories
+
+        # Rank categories within each group by count, then keep the first `top`
+        order = np.lexsort((pair_categories, -pair_counts, pair_groups))
+        sorted_groups = pair_groups[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups)
+        keep = order[rank < top]
+        slots = (pair_groups[keep], rank[rank < top])
+        top_categories = np.full((n_groups, top), -1, dtype=np.int32)
+        top_counts = np.zeros((n_groups, top), dtype=np.int32)
+        top_ratings = np.full((n_groups, top), np.nan, dtype=np.float32)
+        top_categories[slots] = pair_categories[keep]
+        top_counts[slots] = pair_counts[keep]
+        top_ratings[slots] = _average(pair_rating_sums[keep], pair_rated[keep])
+
+        return cls({key: i for i, key in enumerate(keys)}, counts, rated, _average(rating_sums, rated),
+                   review_totals, top_categories, top_counts, top_ratings, categories)
+
+    @classmethod
+    def from_pairs(cls, keys, rows, data):
+        """Build from a group key per row position, e.g. a state column repeated per row"""
+        group_ids, uniques = pd.factorize(keys)
+        return cls.build(list(uniques), group_ids, rows, data)
+
+    @staticmethod
+    def empty():
+        """Summary for a group without any businesses"""
+        return {'businesses': 0, 'rated_businesses': 0, 'average_rating': None, 'total_reviews': 0,
+                'top_categories': []}
+
+    def get(self, key):
+        """Summary dict for one group, or None if the key has no rows"""
+        i = self.ids.get(key)
+        if i is None:
+            return None
+        top_categories = [{'category': str(self.categories[code]), 'businesses': int(count),
+                           'average_rating': _rounded(rating)}
+                          for code, count, rating in zip(self.top_categories[i], self.top_counts[i],
+                                                         self.top_ratings[i]) if code >= 0]
+        return {
+            'businesses': int(self.counts[i]),
+            'rated_businesses': int(self.rated[i]),
+            'average_rating': _rounded(self.average_ratings[i]),
+            'total_reviews': int(self.review_totals[i]),
+            'top_categories': top_categories,
+        }
@@ -1,5 +1,7 @@
-import pandas as pd
 import re
+import sys
+
+from ingest import US_STATES, ingest_csv
 
 def generate_seo_url(text):
     """Generate SEO-friendly URL from text"""
@@ -7,42 +9,35 @@ def generate_seo_url(text):
     url = re.sub(r'\s+', '-', url.strip())
     return url.lower()
 
-# Load the CSV data
-df = pd.read_csv(r'C:\Users\webd5\Downloads\LLC Data.csv')
-
-# Clean and process data
-df = df.fillna('')
-
-# Get unique states and cities (filter out empty values)
-states = sorted([state for state in df['state'].dropna().unique() if state and state.strip()])
-cities = sorted([city for city in df['city'].dropna().unique() if city and city.strip()])
+# Load, clean and dedupe the CSV data in one streaming pass
+csv_file = sys.argv[1] if len(sys.argv) > 1 else r'C:\Users\webd5\Downloads\LLC Data.csv'
+_, report = ingest_csv(csv_file)
+states = report['states']
 
 print("=== LLC Directory Data Analysis ===")
-print(f"Total records: {len(df)}")
+print(f"Total records: {report['rows_kept']}")
 print(f"Unique states: {len(states)}")
-print(f"Unique cities: {len(cities)}")
+print(f"Unique cities: {report['unique_cities']}")
 
 print("\n=== Sample States ===")
-for i, state in enumerate(states[:10]):
-    state_count = len(df[df['state'] == state])
-    print(f"{i+1:2d}. {state} ({state_count} businesses)")
+for i, (state, info) in enumerate(list(states.items())[:10]):
+    print(f"{i+1:2d}. {US_STATES.get(state, state)} ({info['count']} businesses)")
 
 print("\n=== Sample Cities ===")
-for i, city in enumerate(cities[:10]):
-    city_count = len(df[df['city'] == city])
-    print(f"{i+1:2d}. {city} ({city_count} businesses)")
+for i, city in enumerate(report['top_cities'][:10]):
+    print(f"{i+1:2d}. {city['city']}, {city['state']} ({city['count']} businesses)")
 
 print("\n=== Sample State-City Combinations ===")
-sample_states = states[:3]
-for state in sample_states:
-    cities_in_state = sorted([city for city in df[df['state'] == state]['city'].dropna().unique() if city and city.strip()])
-    print(f"\n{state}:")
-    for city in cities_in_state[:5]:
-        count = len(df[(df['state'] == state) & (df['city'] == city)])
-        seo_url = generate_seo_url(city)
-        print(f"  - {city} ({count} businesses) -> /state/{generate_seo_url(state)}/{seo_url}")
+for state, info in list(states.items())[:3]:
+    state_name = US_STATES.get(state, state)
+    print(f"\n{state_name}:")
+    for city in info['top_cities']:
+        print(f"  - {city['city']} ({city['count']} businesses) -> "
+              f"/city/{generate_seo_url(state_name)}/{generate_seo_url(city['city'])}")
 
 print("\n=== Data Quality Check ===")
-print(f"Records with state: {len(df[df['state'].str.strip() != ''])}")
-print(f"Records with city: {len(df[df['city'].str.strip() != ''])}")
-print(f"Records with both state and city: {len(df[(df['state'].str.strip() != '') & (df['city'].str.strip() != '')])}")
+print(f"Records with state: {report['rows_kept'] - report['unknown_state']}")
+print(f"Records with city: {report['rows_kept'] - report['missing_city']}")
+print(f"Records without a rating: {report['missing_rating']}")
+print(f"Dropped without a name: {report['dropped']['missing_name']}")
+print(f"Dropped as duplicates: {report['dropped']['duplicates']}")
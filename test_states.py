@@ -1,91 +1,31 @@
-import pandas as pd
+import sys
 
-# State mapping dictionary
-state_mapping = {
-    'AZ': 'Arizona',
-    'CA': 'California',
-    'CO': 'Colorado',
-    'CT': 'Connecticut',
-    'FL': 'Florida',
-    'GA': 'Georgia',
-    'IL': 'Illinois',
-    'IN': 'Indiana',
-    'KS': 'Kansas',
-    'KY': 'Kentucky',
-    'LA': 'Louisiana',
-    'MA': 'Massachusetts',
-    'MD': 'Maryland',
-    'MI': 'Michigan',
-    'MN': 'Minnesota',
-    'MO': 'Missouri',
-    'MS': 'Mississippi',
-    'MT': 'Montana',
-    'NC': 'North Carolina',
-    'ND': 'North Dakota',
-    'NE': 'Nebraska',
-    'NH': 'New Hampshire',
-    'NJ': 'New Jersey',
-    'NM': 'New Mexico',
-    'NV': 'Nevada',
-    'NY': 'New York',
-    'OH': 'Ohio',
-    'OK': 'Oklahoma',
-    'OR': 'Oregon',
-    'PA': 'Pennsylvania',
-    'RI': 'Rhode Island',
-    'SC': 'South Carolina',
-    'SD': 'South Dakota',
-    'TN': 'Tennessee',
-    'TX': 'Texas',
-    'UT': 'Utah',
-    'VA': 'Virginia',
-    'VT': 'Vermont',
-    'WA': 'Washington',
-    'WI': 'Wisconsin',
-    'WV': 'West Virginia',
-    'WY': 'Wyoming',
-    'AL': 'Alabama',
-    'AK': 'Alaska',
-    'AR': 'Arkansas',
-    'DE': 'Delaware',
-    'HI': 'Hawaii',
-    'IA': 'Iowa',
-    'ID': 'Idaho',
-    'ME': 'Maine'
-}
+from ingest import US_STATES, ingest_csv
 
-# Load the CSV data
-df = pd.read_csv(r'C:\Users\webd5\Downloads\LLC Data.csv')
-
-# Clean and process data
-df = df.fillna('')
+# Load the CSV data; ingest normalizes state names and abbreviations to abbreviations
+csv_file = sys.argv[1] if len(sys.argv) > 1 else r'C:\Users\webd5\Downloads\LLC Data.csv'
+_, report = ingest_csv(csv_file)
 
 print("=== Before State Standardization ===")
 print("Sample states found in data:")
-states_before = df['state'].dropna().unique()
-for state in sorted(states_before)[:10]:
-    count = len(df[df['state'] == state])
-    print(f"  {state} ({count} businesses)")
-
-# Apply state name standardization
-df['state'] = df['state'].replace(state_mapping)
+values_before = {}
+for entry in report['state_values']:
+    values_before[entry['value']] = values_before.get(entry['value'], 0) + entry['count']
+for value in sorted(values_before)[:10]:
+    print(f"  {value or '(blank)'} ({values_before[value]} businesses)")
 
 print("\n=== After State Standardization ===")
 print("Sample states after standardization:")
-states_after = df['state'].dropna().unique()
-for state in sorted(states_after)[:10]:
-    count = len(df[df['state'] == state])
-    print(f"  {state} ({count} businesses)")
+for state, info in list(report['states'].items())[:10]:
+    print(f"  {state} - {US_STATES.get(state, state)} ({info['count']} businesses)")
 
 print(f"\n=== Summary ===")
-print(f"Total records: {len(df)}")
-print(f"Unique states before: {len(states_before)}")
-print(f"Unique states after: {len(states_after)}")
+print(f"Total records: {report['rows_kept']}")
+print(f"Unique states before: {len(values_before)}")
+print(f"Unique states after: {len(report['states'])}")
+print(f"Records with an unknown state: {report['unknown_state']}")
 
 # Show some examples of the conversion
 print(f"\n=== State Name Conversion Examples ===")
-for abbrev, full_name in list(state_mapping.items())[:10]:
-    before_count = len(df[df['state'] == abbrev])
-    after_count = len(df[df['state'] == full_name])
-    if before_count > 0 or after_count > 0:
-        print(f"  {abbrev} -> {full_name} (before: {before_count}, after: {after_count})")
+for entry in report['state_values'][:10]:
+    print(f"  {entry['value'] or '(blank)'} -> {entry['state'] or '(unknown)'} ({entry['count']} businesses)")